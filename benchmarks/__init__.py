@@ -0,0 +1 @@
+# Бенчмарки дэшборда фудкоста
@@ -0,0 +1,84 @@
+# Сравнение старого (dtype=str, все колонки) и нового разбора CSV
+#
+#   python -m benchmarks.bench_csv_parse --rows 500000
+#
+# Каждый парсер запускается в отдельном процессе, чтобы пик памяти (ru_maxrss)
+# не смешивался между прогонами.
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synth import synth_csv
+from foodcost.sheets import SNIFF_BYTES, header_width, normalize_numeric, read_positions, read_source, sniff_delimiter
+
+def legacy_parse_sheet(url: str) -> pd.DataFrame:
+    # прежний read_sheet_by_positions (без категоризации)
+    try:
+        raw = pd.read_csv(url, header=0, dtype=str)
+    except Exception:
+        raw = pd.read_csv(url, header=0, dtype=str, sep=";")
+    def normalize(series):
+        return pd.to_numeric(
+            series.astype(str).str.replace("\u00a0"," ", regex=False).str.replace(" ","", regex=False).str.replace(",",".", regex=False),
+            errors="coerce"
+        )
+    return pd.DataFrame({
+        "Товар": (raw.iloc[:, 3].fillna("") + " " + raw.iloc[:, 4].fillna("")).str.strip(),
+        "Ед. изм.": raw.iloc[:, 5],
+        "Количество": normalize(raw.iloc[:, 6]),
+        "Стоимость": normalize(raw.iloc[:, 13]),
+    })
+
+def projected_parse_sheet(path: str) -> pd.DataFrame:
+    data = read_source(path)
+    sep = sniff_delimiter(data[:SNIFF_BYTES])
+    raw = read_positions(data, sep, header_width(data[:SNIFF_BYTES], sep))
+    return pd.DataFrame({
+        "Товар": (raw.iloc[:, 0].fillna("") + " " + raw.iloc[:, 1].fillna("")).str.strip(),
+        "Ед. изм.": raw.iloc[:, 2],
+        "Количество": normalize_numeric(raw.iloc[:, 3]),
+        "Стоимость": normalize_numeric(raw.iloc[:, 4]),
+    })
+
+PARSERS = {"legacy": legacy_parse_sheet, "projected": projected_parse_sheet}
+
+def _run(name: str, path: str, queue):
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    df = PARSERS[name](path)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+    queue.put((elapsed, peak * 1024, int(df.memory_usage(deep=True).sum()), float(df["Стоимость"].sum())))
+
+def measure(name: str, path: str):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(name, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Старый и новый разбор CSV: время и пик памяти")
+    ap.add_argument("--rows", type=int, default=500_000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sheet.csv")
+        with open(path, "wb") as fh:
+            fh.write(synth_csv(args.rows, args.seed))
+        print(f"строк: {args.rows:,}, файл: {os.path.getsize(path) / 1e6:.1f} МБ")
+        results = {name: measure(name, path) for name in PARSERS}
+    for name, (elapsed, peak, frame_bytes, total) in results.items():
+        print(f"{name:>10}: {elapsed:7.3f} с, пик RSS +{peak / 1e6:8.1f} МБ, кадр {frame_bytes / 1e6:7.1f} МБ, Σ стоимость {total:,.2f}")
+    old, new = results["legacy"], results["projected"]
+    print(f"ускорение x{old[0] / new[0]:.2f}, пик памяти x{old[1] / max(new[1], 1):.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# Набор бенчмарков по стадиям конвейера
+#
+#   python -m benchmarks.suite run --out bench.json                  # 1k/100k/1M строк × 1/10/50 листов
+#   python -m benchmarks.suite run --rows 1000,10000 --sheets 1,5 --out quick.json
+#   python -m benchmarks.suite compare old.json new.json
+#
+# Время каждой стадии — лучшее из --repeat прогонов; память — пик tracemalloc
+# в отдельном прогоне (аллокации numpy/pandas видны, буферы Arrow — нет) и
+# итоговый ru_maxrss процесса.
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.synth import write_sheets
+from foodcost.categories import CategoryMatcher, get_matcher
+from foodcost.charts import render_png, vega_spec
+from foodcost.cube import build_cube, category_summary, filter_cube, other_summary, product_summary
+from foodcost.fuzzy import suggest_categories
+from foodcost.loader import load_sheets
+from foodcost.schema import compact_concat
+from foodcost.sheets import SNIFF_BYTES, header_width, normalize_numeric, parse_sheet, read_positions, read_source, sniff_delimiter
+
+DEFAULT_ROWS = [1_000, 100_000, 1_000_000]
+DEFAULT_SHEETS = [1, 10, 50]
+
+def _raw_columns(paths):
+    out = []
+    for path in paths:
+        data = read_source(path)
+        sep = sniff_delimiter(data[:SNIFF_BYTES])
+        out.append(read_positions(data, sep, header_width(data[:SNIFF_BYTES], sep)))
+    return out
+
+CHART_KINDS = ["top_cost", "top_qty", "cat_cost", "cat_qty"]  # графики дэшборда, каждый — своя стадия
+QTY_UNIT = "кг"  # единица графиков количества по умолчанию в дэшборде
+
+def setup(paths) -> dict:
+    # подготовка вне замеров: сырые колонки для normalize_numeric, без чтения и разбора CSV
+    return {"raw": _raw_columns(paths)}
+
+def _chart_data(ctx, kind: str) -> pd.DataFrame:
+    # те же выборки, что показывает дэшборд; количество — в единице по умолчанию
+    if kind == "top_cost":
+        return ctx["grouped"].head(10)
+    if kind == "top_qty":
+        grouped = ctx["grouped"]
+        return grouped[grouped["Ед. изм."] == QTY_UNIT].sort_values("Количество", ascending=False).head(10)
+    if kind == "cat_cost":
+        return ctx["cat_cost"].head(10)
+    cat_agg = ctx["cat_agg"]
+    return cat_agg[cat_agg["Ед. изм."] == QTY_UNIT].sort_values("Количество", ascending=False).head(10)
+
+def stages(paths):
+    """Стадии по порядку; каждая получает контекст предыдущих и дописывает свой результат."""
+    def read(ctx):
+        get_matcher().clear_memo()  # иначе повторные прогоны не классифицируют заново
+        ctx["frames"], _ = load_sheets(paths, [f"Курс {i}" for i in range(len(paths))], reader=parse_sheet, max_workers=1)
+
+    def normalize(ctx):
+        for raw in ctx["raw"]:
+            normalize_numeric(raw.iloc[:, 3]); normalize_numeric(raw.iloc[:, 4])
+
+    def categorize(ctx):
+        matcher = CategoryMatcher()  # свежий, без памяти прошлых прогонов
+        for df_sheet in ctx["frames"]:
+            matcher.classify(df_sheet["Товар"])
+
+    def concat(ctx):
+        ctx["df"] = compact_concat(ctx["frames"])
+
+    def cube(ctx):
+        ctx["cube"] = build_cube(ctx["df"])
+
+    def filter_(ctx):
+        cube_ = ctx["cube"]
+        units = cube_["Ед. изм."].dropna().astype(str).unique().tolist()[:3]
+        ctx["filtered"] = filter_cube(cube_, courses=["Курс 0"], units=units)
+        filter_cube(cube_)
+
+    def products(ctx):
+        ctx["grouped"] = product_summary(ctx["cube"])
+
+    def categories(ctx):
+        ctx["cat_cost"] = category_summary(ctx["cube"], by_unit=False)
+        ctx["cat_agg"] = category_summary(ctx["cube"])
+
+    def other(ctx):
+        other_summary(ctx["cube"])
+
+    def fuzzy(ctx):
+        suggest_categories(ctx["cube"])
+
+    def chart(render, kind):
+        def run(ctx):
+            render(kind, _chart_data(ctx, kind))  # выборка топ-10 входит в стадию, как в дэшборде
+        return run
+
+    return [
+        ("read_sheet_by_positions", read), ("normalize_numeric", normalize), ("detect_category", categorize),
+        ("concat", concat), ("build_cube", cube), ("filter", filter_), ("groupby_products", products),
+        ("groupby_categories", categories), ("groupby_other", other), ("fuzzy_other", fuzzy),
+    ] + [(f"chart_png_{kind}", chart(render_png, kind)) for kind in CHART_KINDS] \
+      + [(f"chart_vega_{kind}", chart(vega_spec, kind)) for kind in CHART_KINDS]
+
+def run_case(paths, repeat: int):
+    timings = {}
+    prepared = setup(paths)
+    for _ in range(repeat):
+        ctx = dict(prepared)
+        for name, fn in stages(paths):
+            gc.collect()
+            t0 = time.perf_counter()
+            fn(ctx)
+            timings[name] = min(timings.get(name, float("inf")), time.perf_counter() - t0)
+    peaks = {}
+    ctx = dict(prepared)
+    for name, fn in stages(paths):
+        gc.collect()
+        tracemalloc.start()
+        fn(ctx)
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    frame_bytes = int(ctx["df"].memory_usage(deep=True).sum())
+    return timings, peaks, frame_bytes
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+def cmd_run(args) -> int:
+    rows_list = [int(x) for x in args.rows.split(",")]
+    sheets_list = [int(x) for x in args.sheets.split(",")]
+    results = []
+    for total_rows in rows_list:
+        for n_sheets in sheets_list:
+            with tempfile.TemporaryDirectory() as tmp:
+                paths = write_sheets(tmp, total_rows, n_sheets, args.seed)
+                timings, peaks, frame_bytes = run_case(paths, args.repeat)
+            for stage, seconds in timings.items():
+                results.append({"rows": total_rows, "sheets": n_sheets, "stage": stage,
+                                "seconds": round(seconds, 6), "peak_bytes": peaks[stage]})
+            print(f"{total_rows:>9,} строк × {n_sheets:>2} листов: "
+                  f"{sum(timings.values()):8.3f} с, кадр {frame_bytes / 1e6:7.1f} МБ", file=sys.stderr)
+    payload = {
+        "meta": {
+            "commit": git_commit(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(), "pandas": pd.__version__, "platform": platform.platform(),
+            "repeat": args.repeat, "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, ensure_ascii=False, indent=1)
+    print(args.out)
+    return 0
+
+def _load(path: str) -> pd.DataFrame:
+    with open(path, encoding="utf-8") as fh:
+        return pd.DataFrame(json.load(fh)["results"]).set_index(["rows", "sheets", "stage"])
+
+def cmd_compare(args) -> int:
+    old, new = _load(args.old), _load(args.new)
+    both = old.join(new, lsuffix="_old", rsuffix="_new", how="inner")
+    both["x_time"] = (both["seconds_old"] / both["seconds_new"]).round(2)
+    both["x_mem"] = (both["peak_bytes_old"] / both["peak_bytes_new"].clip(lower=1)).round(2)
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(both[["seconds_old", "seconds_new", "x_time", "peak_bytes_old", "peak_bytes_new", "x_mem"]])
+    return 0
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Бенчмарки конвейера фудкоста")
+    sub = ap.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="прогнать матрицу размеров и записать JSON")
+    run.add_argument("--rows", default=",".join(map(str, DEFAULT_ROWS)), help="всего строк, через запятую")
+    run.add_argument("--sheets", default=",".join(map(str, DEFAULT_SHEETS)), help="число листов, через запятую")
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", default=os.path.join("bench_results", f"bench-{git_commit() or 'local'}.json"))
+    run.set_defaults(func=cmd_run)
+    cmp_ = sub.add_parser("compare", help="сравнить два JSON с результатами")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+    cmp_.set_defaults(func=cmd_compare)
+    args = ap.parse_args(argv)
+    if args.command == "run":
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# Генератор синтетических листов в раскладке D/E/F/G/N
+import csv
+import io
+import os
+import random
+
+from foodcost.categories import CATEGORY_KEYWORDS
+from foodcost.sheets import COL_N, POSITIONS
+
+UNITS = ["кг.", "кг", "г", "гр", "шт", "шт.", "л", "мл", "уп"]
+EXTRA_WORDS = ["свежий", "охл.", "зам.", "в/с", "б/к", "весовой", "premium", "1 сорт"]
+UNKNOWN = ["салфетки", "пергамент", "вода питьевая", "фольга", "пакеты", "перчатки"]
+ENDINGS = ["", "а", "ы", "и", "ое", "ый", "ая"]  # ключи словаря — основы слов
+
+def money(value: float, rnd: random.Random) -> str:
+    # «1 234,56» с NBSP или пробелом между разрядами, как в выгрузках
+    whole, frac = f"{value:.2f}".split(".")
+    groups = []
+    while whole:
+        groups.insert(0, whole[-3:]); whole = whole[:-3]
+    return rnd.choice(["\u00a0", " "]).join(groups) + "," + frac
+
+def synth_rows(n_rows: int, seed: int = 0, months: int = 24):
+    # накладные идут по датам: строки листа равномерно покрывают months месяцев с января 2024
+    rnd = random.Random(seed)
+    keywords = [k for keys in CATEGORY_KEYWORDS.values() for k in keys]
+    width = COL_N + 1
+    d, e, f, g, n = POSITIONS
+    for i in range(n_rows):
+        row = [""] * width
+        if rnd.random() < 0.05:
+            month = i * months // n_rows
+            row[1] = f'р/н "{rnd.randint(100000, 999999)}" от {rnd.randint(1, 28):02d}.{month % 12 + 1:02d}.{2024 + month // 12}'
+        else:
+            row[1] = "расход"
+            base = rnd.choice(UNKNOWN) if rnd.random() < 0.08 else rnd.choice(keywords) + rnd.choice(ENDINGS)
+            name = f"{base.capitalize()} {rnd.choice(EXTRA_WORDS)}"
+            if rnd.random() < 0.3:
+                name += f" {rnd.randint(1, 40) * 50} г"  # фасовка — даёт много уникальных названий
+            row[d] = name
+            row[e] = rnd.choice(["", "", "", "упак."])
+            row[f] = rnd.choice(UNITS)
+            row[g] = f"{rnd.uniform(0.01, 50):.3f}".replace(".", ",")
+            row[n] = money(rnd.uniform(1, 50000), rnd)
+        yield row
+
+def synth_csv(n_rows: int, seed: int = 0, sep: str = ",") -> bytes:
+    buf = io.StringIO()
+    w = csv.writer(buf, delimiter=sep, lineterminator="\n")
+    w.writerow(["Расширенный список накладных"] + [""] * COL_N)
+    w.writerows(synth_rows(n_rows, seed))
+    return buf.getvalue().encode("utf-8")
+
+def write_sheets(folder: str, total_rows: int, n_sheets: int, seed: int = 0):
+    """Раскладывает total_rows строк по n_sheets CSV-файлам; возвращает пути."""
+    paths = []
+    per_sheet, extra = divmod(total_rows, n_sheets)
+    for i in range(n_sheets):
+        path = os.path.join(folder, f"sheet_{i:03d}.csv")
+        with open(path, "wb") as fh:
+            fh.write(synth_csv(per_sheet + (1 if i < extra else 0), seed + i))
+        paths.append(path)
+    return paths
@@ -1,219 +1,354 @@
 # foodcost_dashboard_multi_sheets.py
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
+import os
 import re
-from urllib.parse import urlparse, parse_qs
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from foodcost.charts import render_png, vega_spec
+from foodcost.cube import category_summary, filter_cube, filter_options, other_summary, product_summary, totals
+from foodcost.dates import DATE_COLUMN, period_label
+from foodcost.diskcache import CACHE_TTL, SheetCache, parquet_available
+from foodcost.fuzzy import suggest_categories
+from foodcost.loader import DEFAULT_MAX_WORKERS, SheetStatus, load_sheets, report_frame
+from foodcost.paging import PAGE_SIZES, export_bytes, page_count, page_positions, search_mask, sort_order
+from foodcost.perf import Tracer
+from foodcost.schema import memory_report
+from foodcost.sheets import guess_course_from_url, parse_sheet
+from foodcost.store import DatasetStore
+from foodcost.units import unit_report
+from foodcost.workbook import DEFAULT_WORKBOOK, load_workbook_courses
 
 st.set_page_config(page_title="Фудкост — дэшборд (мульти-листы)", layout="wide")
 
-# ===== Колонки по позициям (1-базные) =====
-COL_D, COL_E, COL_F, COL_G, COL_N = 4, 5, 6, 7, 14  # D, E, F, G, N
-
-# ===== Категории =====
-CATEGORY_KEYWORDS = {
-    "Мясо": ["говядин","баранин","свинин","телятин","мяс","фарш","вырезк","стейк","бекон","ветчин","ребр","шея","плечо","окорок","корейк","рибай","флэнк","фланк","порос"],
-    "Птица": ["кур","индейк","утк","цыпл","цыплят","бройл","бедро","грудк","крылыш","окороч","печень кур","сердечк","желудк"],
-    "Рыба/морепродукты": ["лосос","семг","форел","сибас","дорадо","тунец","треск","хек","окун","щук","скумбр","камбал","анчоус","сельд","кревет","мид","кальмар","осьминог","осьминоги","гребеш","краб","устриц","масляная рыба"],
-    "Сыр": ["сыр","моцарелл","пармез","бри","фет","чеддер","горгонзол","маскарпон","рикотт","сулугуни","брынз","эмментал","дорблю","камамбер","плавлен","сливочный сыр","крем-сыр","гауд","халум","халуми"],
-    "Молочка": ["сливк","масло слив","молок","йогурт","сметан","творог","ряженк","кефир","сгущен","сыворотк"],
-    "Фрукты/овощи": ["помид","томат","огур","лук","картоф","капуст","перец","баклаж","кабач","цуккин","морков","свекл","чеснок","имбир","зелень","укроп","петруш","кинз","базилик","шпинат","сельдер","рукол","фенхел","лимон","лайм","апельс","яблок","груш","манго","виноград","ананас","гранат","киви","авокадо","черри","маслин","олив","горошек","броккол","айсберг","вешен","розмар","эстрагон","тархун","мят","вишн","клубник","спарж"],
-    "Бакалея": ["мук","сахар","соль","рис","круп","греч","овсян","макарон","какао","дрожж","крахмал","кускус","булгур","чечевиц","нут","фасол","паниров","ванили","разрыхл","сода","орех","семеч","изюм","шоколад","сироп","масло раст","оливков","панко","уксус","яйц","желток","белок","стружк кокос","хондаши","бадьян","ореган","тимьян","чабрец","кориандр","паприк","фисташ","каперс","кунжут","бульон"],
-    "Хлеб/выпечка": ["лаваш","булк","булочк","хлеб","лепеш","тортиль","пита","багет","чиабат","тесто","слоен","бургер бул","булочки для бургера","тортилья"],
-    "Соусы": ["соус","кетчуп","горчиц","майонез","паст томат","аджик","соев","терияк","табаск","тартар","песто","цезар","хойсин","устрич","васаб","деми","барбекю","ткемал","сальс"],
-    "Прочее": []
-}
-RU_MONTHS = {1:"Январь",2:"Февраль",3:"Март",4:"Апрель",5:"Май",6:"Июнь",7:"Июль",8:"Август",9:"Сентябрь",10:"Октябрь",11:"Ноябрь",12:"Декабрь"}
-
-def detect_category(name: str) -> str:
-    s = str(name).lower()
-    for cat, keys in CATEGORY_KEYWORDS.items():
-        if cat == "Прочее": continue
-        for k in keys:
-            if k in s: return cat
-    return "Прочее"
-
-def normalize_numeric(series: pd.Series) -> pd.Series:
-    return pd.to_numeric(
-        series.astype(str).str.replace("\u00a0"," ", regex=False).str.replace(" ","", regex=False).str.replace(",",".", regex=False),
-        errors="coerce"
-    )
+tracer = Tracer()  # отрезки этого перезапуска скрипта
 
-def guess_course_from_url(url: str, fallback: str) -> str:
-    # попытаемся вытащить gid, чтобы различать листы
-    try:
-        q = parse_qs(urlparse(url).query)
-        gid = q.get("gid", [""])[0]
-        return f"{fallback} (gid={gid})" if gid else fallback
-    except Exception:
-        return fallback
+@st.cache_resource
+def get_sheet_cache() -> SheetCache:
+    return SheetCache()
 
-@st.cache_data(show_spinner=True)
+@st.cache_data(show_spinner=False, ttl=CACHE_TTL)
 def read_sheet_by_positions(url: str) -> pd.DataFrame:
-    # читаем CSV (пробуем и ; как разделитель)
+    return get_sheet_cache().get(url, parser=parse_sheet)
+
+chart_png_misses = [0]  # тело chart_png выполняется только при промахе кэша
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def chart_png(version: str, filter_state: tuple, kind: str, _data: pd.DataFrame) -> bytes:
+    # _data не хэшируется: ключ — версия данных, фильтры и вид графика
+    chart_png_misses[0] += 1
+    return render_png(kind, _data)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def product_table(version: str, filter_state: tuple, _filtered: pd.DataFrame) -> pd.DataFrame:
+    # сводка не пересчитывается при листании, сортировке и поиске
+    return product_summary(_filtered)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def product_sort_order(version: str, filter_state: tuple, column: str, ascending: bool, _grouped: pd.DataFrame):
+    return sort_order(_grouped, column, ascending)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def other_suggestions(version: str, _cube: pd.DataFrame) -> pd.DataFrame:
+    # индекс n-грамм строится по всему кубу один раз на версию данных
+    return suggest_categories(_cube)
+
+@st.cache_resource
+def get_dataset_store() -> DatasetStore:
+    return DatasetStore(ttl=CACHE_TTL)
+
+# ---------- UI: источник данных ----------
+SOURCE_CSV, SOURCE_XLSX = "Google Sheets (CSV)", "Книга Фудкост.xlsx"
+source_mode = st.sidebar.radio("Источник данных", [SOURCE_CSV, SOURCE_XLSX])
+
+if source_mode == SOURCE_CSV:
+    # ---------- UI: список листов ----------
+    st.sidebar.header("Источники (листы Google Sheets)")
+    urls_text = st.sidebar.text_area(
+        "Вставь ссылки CSV по одному на строку (начиная с «Экспресс интенсив» и дальше):",
+        value="https://docs.google.com/spreadsheets/d/e/2PACX-1vT0eKDqy05ncTpiWM0oFxv-dthUJ53rPIMf5A-NFCBAJSrLEDRjHdpz2eNnmR192e5eZMD05Ua4bMD7/pub?gid=0&single=true&output=csv",
+        height=150
+    )
+    courses_text = st.sidebar.text_area(
+        "Имена курсов (опционально, по одному на строку, в той же очередности):",
+        value="Экспресс интенсив",
+        height=100
+    )
+    urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
+    course_names = [c.strip() for c in courses_text.splitlines() if c.strip()]
+    while len(course_names) < len(urls):
+        course_names.append(guess_course_from_url(urls[len(course_names)], f"Курс #{len(course_names)+1}"))
+
+    source_key = ("csv", tuple(urls), tuple(course_names))
+
+    if urls:
+        refresh_idx = st.sidebar.selectbox("Источник для обновления", options=range(len(urls)), format_func=lambda i: course_names[i])
+        if st.sidebar.button("🔄 Обновить источник"):
+            get_sheet_cache().invalidate(urls[refresh_idx])
+            read_sheet_by_positions.clear(urls[refresh_idx])
+            get_dataset_store().invalidate(source_key)
+
+    max_workers = st.sidebar.number_input("Параллельных загрузок", min_value=1, max_value=32, value=DEFAULT_MAX_WORKERS)
+
+    # ---------- Загрузка всех листов ----------
+    _ctx = get_script_run_ctx()
+    run_sheets = {}  # url -> (замеры, результат проверки кэша) этого прогона
+
+    def read_sheet(url: str) -> pd.DataFrame:
+        sheet_cache = get_sheet_cache()
+        before = sheet_cache.timings.get(url)
+        df_sheet = read_sheet_by_positions(url)
+        timing = sheet_cache.timings.get(url)
+        if timing is not None and timing is before:
+            # ответ из st.cache_data: SheetCache.get не вызывался, его замеры — от прошлых загрузок
+            run_sheets[url] = ({"fetch_ms": 0.0, "bytes": 0}, "memory")
+        else:
+            run_sheets[url] = (timing or {}, sheet_cache.outcomes.get(url, "—"))
+        return df_sheet
+
+    def load_source():
+        return load_sheets(
+            urls, course_names, reader=read_sheet, max_workers=max_workers,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), _ctx),
+        )
+else:
+    # ---------- Книга xlsx: каждый лист — курс ----------
+    st.sidebar.header("Книга Excel")
+    workbook_path = st.sidebar.text_input("Путь к файлу .xlsx", value=DEFAULT_WORKBOOK)
     try:
-        raw = pd.read_csv(url, header=0, dtype=str)
-    except Exception:
-        raw = pd.read_csv(url, header=0, dtype=str, sep=";")
-    # позиции (0-базные)
-    d, e, f, g, n = COL_D-1, COL_E-1, COL_F-1, COL_G-1, COL_N-1
-    ncols = raw.shape[1]
-    if max(d,e,f,g,n) >= ncols:
-        return pd.DataFrame()  # структура не совпала
-    prod = (raw.iloc[:, d].fillna("") + " " + raw.iloc[:, e].fillna("")).str.strip()
-    unit = raw.iloc[:, f] if f < ncols else ""
-    qty  = raw.iloc[:, g] if g < ncols else ""
-    cost = raw.iloc[:, n] if n < ncols else ""
-    df = pd.DataFrame({
-        "Товар": prod,
-        "Ед. изм.": unit,
-        "Количество": normalize_numeric(qty),
-        "Стоимость": normalize_numeric(cost),
-        "Дата": pd.NaT
-    })
-    df = df[df["Товар"].astype(str).str.strip() != ""].copy()
-    df["Категория"] = df["Товар"].apply(detect_category)
-    df["Год"] = pd.NaT
-    df["Месяц"] = pd.NaT
-    return df
-
-# ---------- UI: список листов ----------
-st.sidebar.header("Источники (листы Google Sheets)")
-urls_text = st.sidebar.text_area(
-    "Вставь ссылки CSV по одному на строку (начиная с «Экспресс интенсив» и дальше):",
-    value="https://docs.google.com/spreadsheets/d/e/2PACX-1vT0eKDqy05ncTpiWM0oFxv-dthUJ53rPIMf5A-NFCBAJSrLEDRjHdpz2eNnmR192e5eZMD05Ua4bMD7/pub?gid=0&single=true&output=csv",
-    height=150
-)
-courses_text = st.sidebar.text_area(
-    "Имена курсов (опционально, по одному на строку, в той же очередности):",
-    value="Экспресс интенсив",
-    height=100
-)
-urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
-course_names = [c.strip() for c in courses_text.splitlines() if c.strip()]
-while len(course_names) < len(urls):
-    course_names.append(guess_course_from_url(urls[len(course_names)], f"Курс #{len(course_names)+1}"))
-
-# ---------- Загрузка всех листов ----------
-frames = []
-for url, cname in zip(urls, course_names):
-    df_sheet = read_sheet_by_positions(url)
-    if df_sheet.empty:
-        continue
-    df_sheet["Курсы"] = cname
-    frames.append(df_sheet)
-
-df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Товар","Ед. изм.","Категория","Стоимость","Количество","Курсы","Дата","Год","Месяц"])
+        source_key = ("xlsx", workbook_path, os.stat(workbook_path).st_mtime_ns)
+    except OSError as exc:
+        st.sidebar.error(f"Не удалось открыть книгу: {exc}")
+        source_key = ("xlsx", workbook_path, None)
+
+    def load_source():
+        try:
+            result = load_workbook_courses(workbook_path)
+        except (OSError, ValueError) as exc:
+            # ошибка попадает в отчёт снимка: её видно и сессиям, которые получат снимок из хранилища
+            return [], [SheetStatus(workbook_path, os.path.basename(workbook_path), "error", error=str(exc))]
+        get_sheet_cache().evict()  # разобранные книги вытесняются вместе с листами
+        return result
+
+# ---------- Общий снимок данных ----------
+# один кадр на процесс; сессия держит ссылку на свой снимок до следующего перезапуска
+with st.spinner("Загрузка данных..."), tracer.span("load") as rec:
+    snapshot, built = get_dataset_store().get(source_key, load_source)
+st.session_state["snapshot"] = snapshot
+df, load_report = snapshot.df, snapshot.report
+rec.update(rows=len(df), sheets=len(load_report), cache="miss" if built else "hit")
+if source_mode == SOURCE_CSV and run_sheets:
+    # листы читались в этом прогоне (в том числе когда версия данных оказалась известной)
+    per_url = [run_sheets.get(u, ({}, "—"))[0] for u in urls]
+    outcomes = pd.Series([run_sheets.get(u, ({}, "—"))[1] for u in urls]).value_counts().to_dict()
+    # листы грузятся параллельно: это сумма по потокам, а не время на часах
+    tracer.add("fetch", sum(t.get("fetch_ms", 0.0) for t in per_url),
+               bytes=sum(t.get("bytes", 0) for t in per_url), sheets=len(urls), **outcomes)
+    tracer.add("parse", sum(t.get("parse_ms", 0.0) - t.get("categorize_ms", 0.0) for t in per_url))
+    tracer.add("categorize", sum(t.get("categorize_ms", 0.0) for t in per_url))
+if built:
+    # снимок собран в этом прогоне — раскладываем сборку по стадиям
+    for stage, ms in snapshot.timings.items():
+        tracer.add(stage, ms, rows=len(df))
+
+def show_performance():
+    # вызывается и перед каждым st.stop(): прогон без данных тоже попадает в панель и в выгрузку
+    with st.expander("⏱ Производительность"):
+        spans = tracer.frame()
+        st.write(f"Прогон {tracer.run_id}; fetch/parse/categorize/concat/cube — части load, есть только при промахе кэша")
+        st.dataframe(spans, use_container_width=True)
+        if tracer.trace_file:
+            st.caption(f"Отрезки дописываются в {tracer.trace_file}")
+    tracer.export()
 
 st.title("📊 Дэшборд по фудкосту кулинарных курсов (мульти-листы)")
 
 with st.expander("📋 Диагностика"):
-    st.write("Кол-во источников:", len(urls))
+    st.write("Кол-во источников:", len(load_report))
+    if load_report:
+        st.write("Загрузка листов:")
+        st.dataframe(report_frame(load_report), use_container_width=True)
+    sheet_cache = get_sheet_cache()
+    if sheet_cache.enabled:
+        st.write("Дисковый кэш:", sheet_cache.root, f"{sheet_cache.size_bytes() / 1024 / 1024:.1f} МБ")
+        if source_mode == SOURCE_CSV and urls:
+            outcomes = pd.Series([sheet_cache.outcomes.get(u, "—") for u in urls]).value_counts().to_dict()
+            st.write("Листы по результату проверки кэша:", outcomes)
+    st.write("Версия данных:", snapshot.version[:12], get_dataset_store().stats())
+    if snapshot.ingest:
+        st.write("Инкрементальная загрузка:", snapshot.ingest)
+    st.write(f"Даты: колонка {DATE_COLUMN or '—'}, строк с датой {int(df['Дата'].notna().sum()):,} из {len(df):,}; месяцев: {len(snapshot.monthly.periods())}")
     st.write("Первые строки:")
     st.dataframe(df.head(20), use_container_width=True)
     st.write("Размер:", df.shape)
+    mem = memory_report(df)
+    before, after = mem.attrs["before"], mem.attrs["after"]
+    st.write(f"Память: {after / 1024 / 1024:.2f} МБ (в прежней схеме ≈ {before / 1024 / 1024:.2f} МБ, x{before / max(after, 1):.1f})")
+    st.dataframe(mem, use_container_width=True)
+    st.write("Единицы измерения (количество в сводках — в канонических единицах):")
+    st.dataframe(unit_report(df["Ед. изм."]), use_container_width=True)
 
 if df.empty:
-    st.error("Не удалось прочитать данные. Проверь, что каждый лист опубликован как CSV, и структура колонок соответствует (D+E, F, G, N).")
+    if source_mode == SOURCE_XLSX:
+        errors = [s.error for s in load_report if s.status == "error"]
+        if source_key[2] is not None:  # о недоступном файле сайдбар уже сообщил выше
+            for error in errors:
+                st.sidebar.error(f"Не удалось открыть книгу: {error}")
+        st.error("Не удалось прочитать данные из книги. " + (errors[0] if errors else "Ни на одном листе нет таблицы накладных с заголовком «Товар» в колонке D."))
+    else:
+        st.error("Не удалось прочитать данные. Проверь, что каждый лист опубликован как CSV, и структура колонок соответствует (D+E, F, G, N).")
+    show_performance()
     st.stop()
 
 # ---------- Фильтры ----------
+cube = snapshot.cube
+opts = filter_options(cube)
+periods = snapshot.monthly.periods()
+month_range = None
 with st.sidebar:
     st.header("Фильтры")
-    course_opts = sorted(df["Курсы"].dropna().unique().tolist())
-    selected_course = st.multiselect("Курсы", options=course_opts)
-    unit_opts = sorted(df["Ед. изм."].dropna().astype(str).unique().tolist())
-    selected_unit = st.multiselect("Ед. изм.", options=unit_opts)
-    cat_opts = sorted(df["Категория"].dropna().astype(str).unique().tolist())
-    selected_category = st.multiselect("Категория", options=cat_opts)
-
-filtered = df.copy()
-if selected_course:
-    filtered = filtered[filtered["Курсы"].isin(selected_course)]
-if selected_unit:
-    filtered = filtered[filtered["Ед. изм."].astype(str).isin(selected_unit)]
-if selected_category:
-    filtered = filtered[filtered["Категория"].astype(str).isin(selected_category)]
+    if len(periods) > 1:
+        start, end = st.select_slider("Месяцы", options=periods, value=(periods[0], periods[-1]), format_func=period_label)
+        if (start, end) != (periods[0], periods[-1]):
+            month_range = (start, end)  # строки без даты в диапазон не входят
+    selected_course = st.multiselect("Курсы", options=opts["Курсы"])
+    selected_unit = st.multiselect("Ед. изм.", options=opts["Ед. изм."])
+    selected_category = st.multiselect("Категория", options=opts["Категория"])
+    CHART_PNG, CHART_VEGA = "matplotlib (PNG)", "Vega-Lite (вектор)"
+    chart_backend = st.radio("Графики", [CHART_PNG, CHART_VEGA])
+    # килограммы со штуками не складываются: графики количества — по одной единице
+    qty_units = selected_unit or opts["Ед. изм."]
+    qty_unit = st.selectbox("Единица для графиков количества", qty_units,
+                            index=qty_units.index("кг") if "кг" in qty_units else 0)
+
+if month_range is not None:
+    with tracer.span("month_partitions", months=sum(month_range[0] <= p <= month_range[1] for p in periods)) as rec:
+        cube = snapshot.monthly.query(*month_range)
+        rec["rows"] = len(cube)
+with tracer.span("filter", rows=len(cube)) as rec:
+    filtered = filter_cube(cube, selected_course, selected_unit, selected_category)
+    rec["out_rows"] = len(filtered)
 
 if filtered.empty:
     st.info("По текущим фильтрам данных нет.")
+    show_performance()
     st.stop()
 
+filter_state = (tuple(sorted(selected_course)), tuple(sorted(selected_unit)), tuple(sorted(selected_category)), month_range)
+
 # ---------- Сводка по продуктам ----------
 st.subheader("📦 Сводка по продуктам")
-grouped = (
-    filtered.groupby(["Товар","Ед. изм.","Категория"], dropna=False)
-    .agg({"Стоимость":"sum","Количество":"sum","Курсы":lambda x: ", ".join(sorted(set(map(str, x))))})
-    .reset_index()
-    .sort_values("Стоимость", ascending=False)
+with tracer.span("groupby_products", rows=len(filtered)) as rec:
+    grouped = product_table(snapshot.version, filter_state, filtered)
+    rec["out_rows"] = len(grouped)
+
+# в браузер уходит только текущая страница; порядок сортировки кэшируется на версию и фильтры
+SORT_COLUMNS = ["Стоимость","Количество","Товар","Категория","Ед. изм.","Курсы"]
+t1, t2, t3, t4 = st.columns([3, 2, 1, 1])
+query = t1.text_input("Поиск по товару, категории или курсу")
+sort_col = t2.selectbox("Сортировка", SORT_COLUMNS)
+descending = t3.toggle("По убыванию", value=True)
+page_size = t4.selectbox("Строк на странице", PAGE_SIZES, index=1)
+with tracer.span("products_page", rows=len(grouped)) as rec:
+    order = product_sort_order(snapshot.version, filter_state, sort_col, not descending, grouped)
+    mask = search_mask(grouped, query, ["Товар","Категория","Курсы"])
+    found = int(mask.sum())
+    pages = page_count(found, page_size)
+    if st.session_state.get("products_page", 1) > pages:
+        st.session_state["products_page"] = pages  # после поиска страниц могло стать меньше
+    page = st.number_input(f"Страница (из {pages})", min_value=1, max_value=pages, key="products_page")
+    positions = page_positions(order, mask, page, page_size)
+    rec["page_rows"] = len(positions)
+st.dataframe(grouped.iloc[positions], use_container_width=True, hide_index=True)
+first = (page - 1) * page_size + 1 if found else 0
+st.caption(f"Строки {first:,}–{first + len(positions) - 1 if found else 0:,} из {found:,} найденных (в сводке {len(grouped):,})")
+
+export_formats = ["CSV", "Parquet"] if parquet_available() else ["CSV"]
+e1, e2 = st.columns([1, 3])
+export_fmt = e1.radio("Формат выгрузки", export_formats, horizontal=True)
+e2.download_button(
+    f"⬇️ Скачать найденное целиком ({export_fmt})",
+    # файл собирается кусками только по нажатию, в отдельном потоке
+    data=lambda rows=order[mask[order]], fmt=export_fmt.lower(): export_bytes(grouped.iloc[rows], fmt),
+    file_name=f"products.{export_fmt.lower()}",
+    mime="text/csv" if export_fmt == "CSV" else "application/octet-stream",
 )
-st.dataframe(grouped, use_container_width=True)
 
 # ---------- Графики ----------
+def show_chart(kind: str, data: pd.DataFrame, unit: str = None):
+    with tracer.span(f"chart_{kind}", backend="vega" if chart_backend == CHART_VEGA else "png") as rec:
+        if chart_backend == CHART_VEGA:
+            st.vega_lite_chart(vega_spec(kind, data), width="stretch")
+        else:
+            misses = chart_png_misses[0]
+            st.image(chart_png(snapshot.version, filter_state + (unit,), kind, data), width="stretch")
+            rec["cache"] = "miss" if chart_png_misses[0] > misses else "hit"
+    st.caption(f"⏱ {rec['ms']:.0f} мс")
+
 st.subheader("💰 Топ-10 продуктов по стоимости")
 top_costs = grouped.head(10)
 if not top_costs.empty:
-    fig, ax = plt.subplots(figsize=(10,5))
-    sns.barplot(x="Стоимость", y="Товар", data=top_costs, ax=ax)
-    ax.set_title("Топ-10 дорогих продуктов")
-    st.pyplot(fig)
+    show_chart("top_cost", top_costs)
 else:
     st.write("Нет данных для отображения.")
 
-st.subheader("⚖️ Топ-10 продуктов по количеству")
-top_qty = grouped.sort_values(by="Количество", ascending=False).head(10)
+st.subheader(f"⚖️ Топ-10 продуктов по количеству, {qty_unit}")
+by_qty = product_sort_order(snapshot.version, filter_state, "Количество", False, grouped)
+top_qty = grouped.iloc[by_qty[grouped["Ед. изм."].to_numpy()[by_qty] == qty_unit][:10]]
 if not top_qty.empty:
-    fig2, ax2 = plt.subplots(figsize=(10,5))
-    sns.barplot(x="Количество", y="Товар", data=top_qty, ax=ax2)
-    ax2.set_title("Топ-10 по количеству")
-    st.pyplot(fig2)
+    show_chart("top_qty", top_qty, qty_unit)
 else:
     st.write("Нет данных для отображения.")
 
 # ---------- Категории ----------
-st.subheader("🏷️ Категории — расходы и количество")
-cat_agg = (
-    filtered.groupby("Категория", dropna=False)
-    .agg({"Стоимость":"sum","Количество":"sum"})
-    .reset_index()
-    .sort_values("Стоимость", ascending=False)
-)
+st.subheader(f"🏷️ Категории — расходы и количество, {qty_unit}")
+with tracer.span("groupby_categories", rows=len(filtered)):
+    cat_cost = category_summary(filtered, by_unit=False)
+    cat_agg = category_summary(filtered)
+cat_qty = cat_agg[cat_agg["Ед. изм."] == qty_unit].sort_values("Количество", ascending=False)
 col1, col2 = st.columns(2)
 with col1:
-    fig3, ax3 = plt.subplots(figsize=(6,4))
-    sns.barplot(x="Стоимость", y="Категория", data=cat_agg.head(10), ax=ax3)
-    ax3.set_xlabel("Стоимость"); ax3.set_ylabel("")
-    ax3.set_title("Топ категорий по стоимости")
-    st.pyplot(fig3)
+    show_chart("cat_cost", cat_cost.head(10))
 with col2:
-    fig4, ax4 = plt.subplots(figsize=(6,4))
-    sns.barplot(x="Количество", y="Категория", data=cat_agg.sort_values("Количество", ascending=False).head(10), ax=ax4)
-    ax4.set_xlabel("Количество"); ax4.set_ylabel("")
-    ax4.set_title("Топ категорий по количеству")
-    st.pyplot(fig4)
+    if not cat_qty.empty:
+        show_chart("cat_qty", cat_qty.head(10), qty_unit)
+    else:
+        st.write("Нет данных для отображения.")
+
+# ---------- Помесячная динамика ----------
+if periods:
+    st.subheader("📅 Помесячная динамика")
+    with tracer.span("monthly_trend") as rec:
+        trend = snapshot.monthly.trend(selected_course, selected_unit, selected_category, *(month_range or (None, None)))
+        rec["months"] = len(trend)
+    month_start = pd.to_datetime(trend["Период"].astype(str), format="%Y%m")
+    st.line_chart(trend.set_index(month_start)["Стоимость"], width="stretch")
+    st.dataframe(trend.drop(columns=["Период"]), use_container_width=True)
 
 # ---------- Итоги ----------
 st.subheader("📈 Общая статистика")
 c1, c2, c3 = st.columns(3)
-c1.metric("Общая стоимость", f"{filtered['Стоимость'].sum():,.2f} ₽")
-c2.metric("Всего строк", f"{filtered.shape[0]:,}")
+summary = totals(filtered)
+c1.metric("Общая стоимость", f"{summary['Стоимость']:,.2f} ₽")
+c2.metric("Всего строк", f"{summary['Строк']:,}")
 c3.metric("Уникальных продуктов", f"{grouped[['Товар','Ед. изм.']].drop_duplicates().shape[0]:,}")
 
 # ---------- Инспектор «Прочее» ----------
 st.subheader("❓ Прочее — что ещё не распознано словарём")
-other = filtered[filtered["Категория"] == "Прочее"]
-if other.empty:
+with tracer.span("groupby_other", rows=len(filtered)):
+    other_top = other_summary(filtered, limit=50)
+if other_top.empty:
     st.success("Отлично! Все позиции классифицированы.")
 else:
-    other_top = (
-        other.groupby(["Товар","Курсы"], dropna=False)
-        .agg({"Стоимость":"sum","Ед. изм.": lambda x: ", ".join(sorted(set(map(str, x))))})
-        .reset_index()
-        .rename(columns={"Ед. изм.":"Ед. изм. (варианты)"})
-        .sort_values("Стоимость", ascending=False)
-        .head(50)
-    )
-    st.write("Уточни категории для этих позиций — добавлю в словарь:")
+    with tracer.span("fuzzy_suggest") as rec:
+        suggestions = other_suggestions(snapshot.version, snapshot.cube)
+        rec.update(names=len(suggestions), suggested=int(suggestions["Предложение"].notna().sum()))
+    other_top = other_top.merge(suggestions, on="Товар", how="left")
+    st.write(f"Уточни категории для этих позиций — добавлю в словарь. "
+             f"Нечёткое сравнение предлагает категорию для {rec['suggested']:,} из {rec['names']:,} названий «Прочего»:")
     st.dataframe(other_top, use_container_width=True)
+
+# ---------- Производительность ----------
+show_performance()
@@ -0,0 +1 @@
+# foodcost — ядро дэшборда фудкоста без зависимости от streamlit
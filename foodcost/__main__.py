@@ -0,0 +1,5 @@
+import sys
+
+from foodcost.cli import main
+
+sys.exit(main())
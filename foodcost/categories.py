@@ -0,0 +1,95 @@
+# Категоризация товаров по словарю ключевых слов
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ===== Категории =====
+CATEGORY_KEYWORDS = {
+    "Мясо": ["говядин","баранин","свинин","телятин","мяс","фарш","вырезк","стейк","бекон","ветчин","ребр","шея","плечо","окорок","корейк","рибай","флэнк","фланк","порос"],
+    "Птица": ["кур","индейк","утк","цыпл","цыплят","бройл","бедро","грудк","крылыш","окороч","печень кур","сердечк","желудк"],
+    "Рыба/морепродукты": ["лосос","семг","форел","сибас","дорадо","тунец","треск","хек","окун","щук","скумбр","камбал","анчоус","сельд","кревет","мид","кальмар","осьминог","осьминоги","гребеш","краб","устриц","масляная рыба"],
+    "Сыр": ["сыр","моцарелл","пармез","бри","фет","чеддер","горгонзол","маскарпон","рикотт","сулугуни","брынз","эмментал","дорблю","камамбер","плавлен","сливочный сыр","крем-сыр","гауд","халум","халуми"],
+    "Молочка": ["сливк","масло слив","молок","йогурт","сметан","творог","ряженк","кефир","сгущен","сыворотк"],
+    "Фрукты/овощи": ["помид","томат","огур","лук","картоф","капуст","перец","баклаж","кабач","цуккин","морков","свекл","чеснок","имбир","зелень","укроп","петруш","кинз","базилик","шпинат","сельдер","рукол","фенхел","лимон","лайм","апельс","яблок","груш","манго","виноград","ананас","гранат","киви","авокадо","черри","маслин","олив","горошек","броккол","айсберг","вешен","розмар","эстрагон","тархун","мят","вишн","клубник","спарж"],
+    "Бакалея": ["мук","сахар","соль","рис","круп","греч","овсян","макарон","какао","дрожж","крахмал","кускус","булгур","чечевиц","нут","фасол","паниров","ванили","разрыхл","сода","орех","семеч","изюм","шоколад","сироп","масло раст","оливков","панко","уксус","яйц","желток","белок","стружк кокос","хондаши","бадьян","ореган","тимьян","чабрец","кориандр","паприк","фисташ","каперс","кунжут","бульон"],
+    "Хлеб/выпечка": ["лаваш","булк","булочк","хлеб","лепеш","тортиль","пита","багет","чиабат","тесто","слоен","бургер бул","булочки для бургера","тортилья"],
+    "Соусы": ["соус","кетчуп","горчиц","майонез","паст томат","аджик","соев","терияк","табаск","тартар","песто","цезар","хойсин","устрич","васаб","деми","барбекю","ткемал","сальс"],
+    "Прочее": []
+}
+OTHER_CATEGORY = "Прочее"
+MEMO_LIMIT = 500_000  # уникальных названий в памяти классификатора
+
+def detect_category(name: str) -> str:
+    s = str(name).lower()
+    for cat, keys in CATEGORY_KEYWORDS.items():
+        if cat == OTHER_CATEGORY: continue
+        for k in keys:
+            if k in s: return cat
+    return OTHER_CATEGORY
+
+class CategoryMatcher:
+    """Один скомпилированный regex вместо вложенного цикла detect_category.
+
+    Каждая категория — отдельная ветка альтернативы с lookahead
+    `(?=.*?(k1|k2|...))`. Ветки пробуются в порядке словаря, поэтому
+    побеждает первая подходящая категория — ровно как в detect_category.
+    """
+
+    def __init__(self, keywords: dict = CATEGORY_KEYWORDS, other: str = OTHER_CATEGORY):
+        self.other = other
+        self.categories = [c for c, keys in keywords.items() if c != other and keys]
+        branches = [
+            "(?=.*?(" + "|".join(re.escape(k) for k in keywords[c]) + "))"
+            for c in self.categories
+        ]
+        self.pattern = re.compile("^(?:" + "|".join(branches) + ")", re.DOTALL)
+        self._memo = {}  # название -> индекс категории; переживает перезагрузки листов
+        self._lock = threading.Lock()  # листы классифицируются из потоков загрузчика
+        self.memo_hits = 0
+
+    def _classify_uniques(self, uniques: pd.Series) -> np.ndarray:
+        hits = uniques.astype(str).str.lower().str.extract(self.pattern)
+        found = hits.notna().to_numpy()
+        return np.where(found.any(axis=1), found.argmax(axis=1), len(self.categories))
+
+    def clear_memo(self):
+        with self._lock:
+            self._memo.clear()
+            self.memo_hits = 0
+
+    def classify(self, names: pd.Series) -> pd.Series:
+        # каждое уникальное название классифицируется один раз; уже встречавшиеся
+        # (в том числе при прошлой загрузке листа) берутся из памяти
+        codes, uniques = pd.factorize(names, use_na_sentinel=True)
+        labels = np.array(self.categories + [self.other], dtype=object)
+        uniques = pd.Series(uniques, dtype=object)
+        # память общая для потоков: читается и пополняется только под блокировкой,
+        # а сама классификация новых названий идёт без неё
+        with self._lock:
+            memo = self._memo
+            first = np.fromiter((memo.get(u, -1) for u in uniques.tolist()), dtype=np.intp, count=len(uniques))
+        todo = first < 0
+        if todo.any():
+            first[todo] = self._classify_uniques(uniques[todo])
+        with self._lock:
+            if todo.any():
+                if len(self._memo) + int(todo.sum()) > MEMO_LIMIT:
+                    self._memo.clear()
+                self._memo.update(zip(uniques[todo].tolist(), first[todo].tolist()))
+            self.memo_hits += int((~todo).sum())
+        # NaN-названия (код -1) уходят в «Прочее», как str(nan) у detect_category
+        first = np.append(first, len(self.categories))
+        return pd.Series(labels[first[codes]], index=names.index, dtype=object)
+
+_MATCHER = None
+
+def get_matcher() -> CategoryMatcher:
+    global _MATCHER
+    if _MATCHER is None:
+        _MATCHER = CategoryMatcher()
+    return _MATCHER
+
+def classify_products(names: pd.Series) -> pd.Series:
+    return get_matcher().classify(names)
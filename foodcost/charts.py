@@ -0,0 +1,64 @@
+# Столбчатые графики: PNG через matplotlib/seaborn или Vega-Lite без растеризации
+import io
+from dataclasses import dataclass
+
+import pandas as pd
+
+PNG_DPI = 200  # как у st.pyplot
+
+@dataclass(frozen=True)
+class ChartSpec:
+    x: str
+    y: str
+    title: str
+    figsize: tuple
+    xlabel: str = None
+    ylabel: str = None
+
+CHARTS = {
+    "top_cost": ChartSpec("Стоимость", "Товар", "Топ-10 дорогих продуктов", (10, 5)),
+    "top_qty": ChartSpec("Количество", "Товар", "Топ-10 по количеству", (10, 5)),
+    "cat_cost": ChartSpec("Стоимость", "Категория", "Топ категорий по стоимости", (6, 4), "Стоимость", ""),
+    "cat_qty": ChartSpec("Количество", "Категория", "Топ категорий по количеству", (6, 4), "Количество", ""),
+}
+
+def render_png(kind: str, data: pd.DataFrame) -> bytes:
+    """Рисует график в PNG и сразу освобождает фигуру.
+
+    Figure создаётся без pyplot, поэтому не попадает в глобальный реестр
+    фигур и не копится на долгоживущем сервере.
+    """
+    import seaborn as sns
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    spec = CHARTS[kind]
+    fig = Figure(figsize=spec.figsize)
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.subplots()
+        sns.barplot(x=spec.x, y=spec.y, data=data, ax=ax)
+        if spec.xlabel is not None:
+            ax.set_xlabel(spec.xlabel)
+        if spec.ylabel is not None:
+            ax.set_ylabel(spec.ylabel)
+        ax.set_title(spec.title)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=PNG_DPI, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+def vega_spec(kind: str, data: pd.DataFrame) -> dict:
+    """Vega-Lite: график рисует браузер, сервер отдаёт только десяток строк."""
+    spec = CHARTS[kind]
+    rows = data[[spec.y, spec.x]].astype({spec.y: str}).to_dict(orient="records")
+    return {
+        "title": spec.title,
+        "data": {"values": rows},
+        "mark": {"type": "bar", "tooltip": True},
+        "encoding": {
+            "x": {"field": spec.x, "type": "quantitative", "title": spec.xlabel if spec.xlabel is not None else spec.x},
+            "y": {"field": spec.y, "type": "nominal", "sort": None, "title": spec.ylabel if spec.ylabel is not None else spec.y},
+        },
+    }
@@ -0,0 +1,106 @@
+# Безголовый режим: отчёты без streamlit/matplotlib
+#
+#   python -m foodcost report --url URL [--url URL ...] --out reports/
+#   python -m foodcost report --xlsx Фудкост.xlsx --category Мясо --format parquet
+#   python -m foodcost report --xlsx Фудкост.xlsx --month-from 202503 --month-to 202505
+import argparse
+import os
+import sys
+
+from foodcost.cube import build_cube, category_summary, filter_cube, other_summary, product_summary
+from foodcost.loader import DEFAULT_MAX_WORKERS, load_sheets
+from foodcost.schema import compact_concat
+from foodcost.sheets import guess_course_from_url, parse_sheet
+from foodcost.timeseries import MonthlyStore
+
+def read_lines(path: str):
+    with open(path, encoding="utf-8") as fh:
+        return [line.strip() for line in fh if line.strip() and not line.lstrip().startswith("#")]
+
+def load_sources(args):
+    if args.xlsx:
+        from foodcost.workbook import load_workbook_courses
+        return load_workbook_courses(args.xlsx)
+    urls = list(args.url or [])
+    if args.urls_file:
+        urls += read_lines(args.urls_file)
+    names = list(args.course or [])
+    while len(names) < len(urls):
+        names.append(guess_course_from_url(urls[len(names)], f"Курс #{len(names)+1}"))
+    reader = parse_sheet
+    if not args.no_cache:
+        from foodcost.diskcache import SheetCache
+        reader = SheetCache().get
+    return load_sheets(urls, names, reader=reader, max_workers=args.workers)
+
+def build_report(frames, courses=None, units=None, categories=None, other_limit: int = 50,
+                 month_from: int = None, month_to: int = None) -> dict:
+    """Те же таблицы, что и в дэшборде: сводка по продуктам, категории, «Прочее», помесячный тренд."""
+    cube = build_cube(compact_concat(frames))
+    monthly, _ = MonthlyStore().update(cube)
+    if month_from is not None or month_to is not None:
+        cube = monthly.query(month_from or 0, month_to or 999912)
+    cube = filter_cube(cube, courses, units, categories)
+    return {
+        "products": product_summary(cube),
+        "categories": category_summary(cube),
+        "other": other_summary(cube, limit=other_limit),
+        "monthly": monthly.trend(courses, units, categories, month_from, month_to),
+    }
+
+def write_tables(tables: dict, out_dir: str, fmt: str):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == "parquet":
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+def cmd_report(args) -> int:
+    try:
+        frames, report = load_sources(args)
+    except (OSError, ValueError) as exc:
+        # битая или не-xlsx книга, недоступный файл со ссылками
+        print(f"Ошибка: {exc}", file=sys.stderr)
+        return 1
+    for s in report:
+        line = f"{s.status:>5} {s.rows:>7} строк {s.seconds:7.3f} с  {s.course}"
+        print(line + (f"  — {s.error}" if s.error else ""), file=sys.stderr)
+    if not frames:
+        print("Нет данных: ни один источник не прочитан.", file=sys.stderr)
+        return 1
+    tables = build_report(frames, args.filter_course, args.unit, args.category, args.other_limit,
+                          args.month_from, args.month_to)
+    for path in write_tables(tables, args.out, args.format):
+        print(path)
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m foodcost", description="Фудкост без UI")
+    sub = ap.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="Сводки по продуктам, категориям и «Прочее» в CSV/Parquet")
+    src = rep.add_mutually_exclusive_group(required=True)
+    src.add_argument("--url", action="append", help="ссылка на CSV листа (можно несколько)")
+    src.add_argument("--urls-file", help="файл со ссылками, по одной на строку")
+    src.add_argument("--xlsx", help="книга .xlsx: каждый лист — курс")
+    rep.add_argument("--course", action="append", help="имя курса для --url, в том же порядке")
+    rep.add_argument("--filter-course", action="append", help="фильтр: курс")
+    rep.add_argument("--unit", action="append", help="фильтр: ед. изм.")
+    rep.add_argument("--category", action="append", help="фильтр: категория")
+    rep.add_argument("--month-from", type=int, help="фильтр: первый месяц, ГГГГММ (202501)")
+    rep.add_argument("--month-to", type=int, help="фильтр: последний месяц, ГГГГММ")
+    rep.add_argument("--out", default="reports", help="папка для результатов (reports)")
+    rep.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    rep.add_argument("--other-limit", type=int, default=50, help="строк в таблице «Прочее»")
+    rep.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="параллельных загрузок")
+    rep.add_argument("--no-cache", action="store_true", help="не использовать дисковый кэш листов")
+    rep.set_defaults(func=cmd_report)
+    return ap
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,109 @@
+# Предагрегированный куб (Товар, Ед. изм., Категория, Курсы, Период) для фильтров и сводок
+import numpy as np
+import pandas as pd
+
+from foodcost.categories import OTHER_CATEGORY
+from foodcost.dates import NO_DATE, period_key
+from foodcost.schema import NUMERIC_DECIMALS, restore_float
+from foodcost.units import normalize_units
+
+PERIOD = "Период"  # месяц ГГГГММ, см. dates.period_key
+DIMENSIONS = ["Товар","Ед. изм.","Категория","Курсы",PERIOD]
+MEASURES = ["Стоимость","Количество"]
+ROWS = "Строк"
+DISPLAY_DECIMALS = {"Стоимость": 2, "Количество": 6}  # только для таблиц; суммы в кубе не округляются
+
+def build_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """Суммы по всем измерениям фильтров; строится один раз на версию данных."""
+    if df.empty:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES + [ROWS])
+    # суммируем в float64 без округления строк; float32 из компактной схемы восстанавливается точно
+    df = df.assign(**{m: restore_float(df[m], NUMERIC_DECIMALS[m]) for m in MEASURES})
+    # «г», «гр», «кг.» -> кг и т. п.: один товар в разных написаниях единицы сводится в одну строку
+    df["Ед. изм."], df["Количество"] = normalize_units(df["Ед. изм."], df["Количество"])
+    df[PERIOD] = period_key(df["Дата"]) if "Дата" in df.columns else NO_DATE
+    cube = (
+        df.groupby(DIMENSIONS, dropna=False, observed=True, sort=False)
+        .agg(**{m: (m, "sum") for m in MEASURES}, **{ROWS: ("Стоимость", "size")})
+        .reset_index()
+    )
+    return cube
+
+def _plain(frame: pd.DataFrame) -> pd.DataFrame:
+    # категориальные ключи — обратно в обычные значения для таблиц и графиков;
+    # суммы округляются здесь, при выводе, а не в кубе
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype(frame[col].cat.categories.dtype)
+        elif col in DISPLAY_DECIMALS:
+            frame[col] = frame[col].round(DISPLAY_DECIMALS[col])
+    return frame
+
+def filter_options(cube: pd.DataFrame) -> dict:
+    return {
+        "Курсы": sorted(cube["Курсы"].dropna().astype(str).unique().tolist()),
+        "Ед. изм.": sorted(cube["Ед. изм."].dropna().astype(str).unique().tolist()),
+        "Категория": sorted(cube["Категория"].dropna().astype(str).unique().tolist()),
+    }
+
+def _isin(col: pd.Series, values) -> pd.Series:
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        # проверяем словарь, а не каждую строку; код -1 (NaN) — последний False
+        hit = np.append(col.cat.categories.astype(str).isin(values), False)
+        return pd.Series(hit[col.cat.codes.to_numpy()], index=col.index)
+    return col.astype(str).isin(values)
+
+def filter_cube(cube: pd.DataFrame, courses=None, units=None, categories=None) -> pd.DataFrame:
+    mask = pd.Series(True, index=cube.index)
+    if courses:
+        mask &= _isin(cube["Курсы"], courses)
+    if units:
+        mask &= _isin(cube["Ед. изм."], units)
+    if categories:
+        mask &= _isin(cube["Категория"], categories)
+    return cube[mask]
+
+def _joined(groups: np.ndarray, values: pd.Series) -> list:
+    """Уникальные значения по группе, отсортированные и склеенные через запятую.
+
+    groups — номер группы каждой строки (ngroup); результат идёт в порядке
+    номеров. Пары (группа, значение) сортируются одним проходом, а границы
+    групп режут массив — без вызова Python-функции groupby на каждую группу.
+    """
+    pairs = pd.DataFrame({"g": groups, "v": values.astype(str).fillna("nan").to_numpy(dtype=object)})
+    pairs = pairs.drop_duplicates().sort_values(["g", "v"])
+    g = pairs["g"].to_numpy()
+    return [", ".join(chunk) for chunk in np.split(pairs["v"].to_numpy(), np.flatnonzero(np.diff(g)) + 1)]
+
+def product_summary(cube: pd.DataFrame) -> pd.DataFrame:
+    keys = ["Товар","Ед. изм.","Категория"]
+    grouped = cube.groupby(keys, dropna=False, observed=True, sort=False)
+    sums = grouped[MEASURES].sum()
+    sums["Курсы"] = _joined(grouped.ngroup().to_numpy(), cube["Курсы"])
+    return _plain(sums.reset_index()).sort_values("Стоимость", ascending=False)
+
+def category_summary(cube: pd.DataFrame, by_unit: bool = True) -> pd.DataFrame:
+    """Суммы по категориям.
+
+    Килограммы со штуками не складываются: строка на пару (Категория, Ед. изм.).
+    by_unit=False — строка на категорию и только стоимость, рубли складываются
+    между единицами.
+    """
+    keys, measures = (["Категория","Ед. изм."], MEASURES) if by_unit else (["Категория"], ["Стоимость"])
+    return (
+        _plain(cube.groupby(keys, dropna=False, observed=True)[measures].sum().reset_index())
+        .sort_values("Стоимость", ascending=False)
+    )
+
+def other_summary(cube: pd.DataFrame, limit: int = 50) -> pd.DataFrame:
+    other = cube[cube["Категория"] == OTHER_CATEGORY]
+    if other.empty:
+        return pd.DataFrame(columns=["Товар","Курсы","Стоимость","Ед. изм. (варианты)"])
+    keys = ["Товар","Курсы"]
+    grouped = other.groupby(keys, dropna=False, observed=True, sort=False)
+    out = grouped[["Стоимость"]].sum()
+    out["Ед. изм. (варианты)"] = _joined(grouped.ngroup().to_numpy(), other["Ед. изм."])
+    return _plain(out.reset_index()).sort_values("Стоимость", ascending=False).head(limit)
+
+def totals(cube: pd.DataFrame) -> dict:
+    return {"Стоимость": float(cube["Стоимость"].sum()), ROWS: int(cube[ROWS].sum())}
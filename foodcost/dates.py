@@ -0,0 +1,101 @@
+# Даты строк: колонка листа, период в шапке листа или имя курса
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+RU_MONTHS = {1:"Январь",2:"Февраль",3:"Март",4:"Апрель",5:"Май",6:"Июнь",7:"Июль",8:"Август",9:"Сентябрь",10:"Октябрь",11:"Ноябрь",12:"Декабрь"}
+
+# буква колонки, где стоят строки накладных «р/н "207523" от 01.05.2025»; пусто — даты не читать
+DATE_COLUMN = os.environ.get("FOODCOST_DATE_COL", "B").strip().upper()
+DATE_RULES = 3  # версия правил разбора дат; входит в ключи кэшей, чтобы старые разборы не подхватывались
+
+_CELL_DATE = r"(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4})|(?P<year2>\d{4})-(?P<month2>\d{2})-(?P<day2>\d{2})"  # дд.мм.гггг или гггг-мм-дд
+# ячейка целиком — дата: обычная колонка дат или дата/время из xlsx («2025-05-01 00:00:00»)
+WHOLE_DATE = (r"^\s*(?:(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4})"
+              r"|(?P<year2>\d{4})-(?P<month2>\d{2})-(?P<day2>\d{2})(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?)\s*$")
+# заголовок накладной: тип (р/н, п/н, взр, д/к, ...), номер и дата. «Дата печати: ...» и «Период c ...»
+# на каждой странице выгрузки — не накладные, их даты строкам не достаются
+INVOICE_DATE = r'^\s*[^\W\d_]{1,3}(?:/[^\W\d_]{1,3})?\s+"?[^"\s]+"?\s+от\s+(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4})'
+PERIOD_RE = re.compile(r"Период\s+[cс]\s+(\d{1,2})\.(\d{1,2})\.(\d{4})", re.IGNORECASE)  # «c» в выгрузках бывает латинской
+_MONTH_YEAR_RE = re.compile(r"\b(\d{1,2})\.(\d{4})\b")
+_MONTH_NAME_RE = re.compile(r"([а-яё]+)\s+(\d{4})", re.IGNORECASE)
+_MONTH_STEMS = {"янв":1,"фев":2,"мар":3,"апр":4,"май":5,"мая":5,"июн":6,"июл":7,"авг":8,"сен":9,"окт":10,"ноя":11,"дек":12}
+
+def column_index(letter: str):
+    """0-базный номер колонки по букве («B» -> 1, «AA» -> 26); None для пустой строки."""
+    if not letter:
+        return None
+    idx = 0
+    for ch in letter:
+        idx = idx * 26 + ord(ch) - ord("A") + 1
+    return idx - 1
+
+def parse_dates(cells: pd.Series, pattern: str = _CELL_DATE) -> pd.Series:
+    """Первая дата по pattern (группы day, month, year) в каждой ячейке; NaT, где её нет.
+
+    Разбирается каждое уникальное значение один раз: в колонке накладных
+    почти все строки — одинаковое «расход».
+    """
+    codes, uniques = pd.factorize(cells.astype(object), use_na_sentinel=True)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(pattern)
+    ymd = pd.DataFrame({
+        # у _CELL_DATE вторая форма записи — в группах year2, month2, day2
+        k: parts[k].fillna(parts[f"{k}2"]) if f"{k}2" in parts else parts[k] for k in ("year", "month", "day")
+    }).astype("float64")
+    found = pd.to_datetime(ymd, errors="coerce") if len(ymd) else pd.Series([], dtype="datetime64[ns]")
+    # код -1 (пустая ячейка) попадает на добавленный в конец NaT
+    values = np.append(found.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(values[codes], index=cells.index, dtype="datetime64[ns]")
+
+def row_dates(cells: pd.Series, default=pd.NaT) -> pd.Series:
+    # сначала ячейки, которые целиком дата, затем заголовки накладных; дата действует
+    # до следующей, строки до первой получают default
+    return parse_dates(cells, WHOLE_DATE).fillna(parse_dates(cells, INVOICE_DATE)).ffill().fillna(default)
+
+def period_start(text: str):
+    # «Период c 01.05.2025 по 31.05.2025» в шапке листа -> 2025-05-01
+    m = PERIOD_RE.search(text or "")
+    if m is None:
+        return pd.NaT
+    return pd.to_datetime(f"{m.group(3)}-{m.group(2)}-{m.group(1)}", errors="coerce")
+
+def date_from_text(text: str):
+    """Дата из метаданных (имя курса, название листа): «01.05.2025», «05.2025», «май 2025»."""
+    text = str(text or "")
+    start = parse_dates(pd.Series([text])).iat[0]
+    if not pd.isna(start):
+        return start
+    m = _MONTH_YEAR_RE.search(text)
+    if m and 1 <= int(m.group(1)) <= 12:
+        return pd.Timestamp(int(m.group(2)), int(m.group(1)), 1)
+    for word, year in _MONTH_NAME_RE.findall(text):
+        month = _MONTH_STEMS.get(word.lower()[:3])
+        if month:
+            return pd.Timestamp(int(year), month, 1)
+    return pd.NaT
+
+def fill_course_date(df_sheet: pd.DataFrame, course: str) -> pd.DataFrame:
+    # последний источник: дата в имени курса для строк, у которых её так и не нашлось
+    if "Дата" not in df_sheet.columns or not df_sheet["Дата"].isna().any():
+        return df_sheet
+    fallback = date_from_text(course)
+    if not pd.isna(fallback):
+        df_sheet["Дата"] = df_sheet["Дата"].fillna(fallback)
+    return df_sheet
+
+NO_DATE = 0  # период строк без даты
+
+def period_key(dates: pd.Series) -> np.ndarray:
+    """Месяц как целое ГГГГММ (202505); у строк без даты — NO_DATE."""
+    values = dates.to_numpy(dtype="datetime64[M]")
+    months = values.astype("int64")  # месяцев от 1970-01
+    key = (months // 12 + 1970) * 100 + months % 12 + 1
+    return np.where(np.isnat(values), NO_DATE, key).astype("int32")
+
+def period_label(key: int) -> str:
+    key = int(key)
+    if key == NO_DATE:
+        return "без даты"
+    return f"{RU_MONTHS[key % 100]} {key // 100}"
@@ -0,0 +1,147 @@
+# Дисковый кэш разобранных листов (Parquet) с условной ревалидацией
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+
+from foodcost.sheets import LAYOUT, fetch, parse_sheet
+
+CACHE_DIR = os.environ.get("FOODCOST_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "foodcost_dashboard"))
+CACHE_TTL = float(os.environ.get("FOODCOST_CACHE_TTL", 300))               # сек. без ревалидации
+CACHE_MAX_BYTES = int(float(os.environ.get("FOODCOST_CACHE_MAX_MB", 512)) * 1024 * 1024)
+CACHE_MAX_AGE = float(os.environ.get("FOODCOST_CACHE_MAX_AGE_DAYS", 30)) * 86400
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+class SheetCache:
+    """Нормализованные кадры листов на диске, ключ — URL.
+
+    Свежая запись (моложе ttl) читается без сети; устаревшая ревалидируется
+    по ETag/Last-Modified. Вытеснение — по возрасту и общему размеру (LRU).
+    """
+
+    def __init__(self, root: str = CACHE_DIR, ttl: float = CACHE_TTL,
+                 max_bytes: int = CACHE_MAX_BYTES, max_age: float = CACHE_MAX_AGE):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.enabled = parquet_available()
+        self._lock = threading.Lock()
+        self.outcomes = {}  # url -> fresh / not-modified / same-content / parsed
+        self.timings = {}  # url -> мс и байты последней проверки: fetch_ms, bytes, parse_ms, categorize_ms
+        if self.enabled:
+            os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url: str):
+        key = hashlib.sha1(url.encode("utf-8") + b"\0" + LAYOUT).hexdigest()  # раскладка колонок — часть ключа
+        base = os.path.join(self.root, key)
+        return base + ".parquet", base + ".json"
+
+    def _read_meta(self, meta_path: str) -> dict:
+        try:
+            with open(meta_path, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, url: str, df: pd.DataFrame, meta: dict):
+        data_path, meta_path = self._paths(url)
+        tmp = f"{data_path}.{threading.get_ident()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, data_path)
+        self._write_meta(meta_path, meta)
+
+    def _write_meta(self, meta_path: str, meta: dict):
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta, fh, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+
+    def get(self, url: str, parser=parse_sheet) -> pd.DataFrame:
+        if not self.enabled:
+            return parser(url)
+        data_path, meta_path = self._paths(url)
+        meta = self._read_meta(meta_path) if os.path.exists(data_path) else {}
+        now = time.time()
+        if meta and now - meta.get("checked_at", 0) < self.ttl:
+            self.timings[url] = {"fetch_ms": 0.0, "bytes": 0}
+            return self._reuse(url, data_path, "fresh")
+        t0 = time.perf_counter()
+        payload, etag, last_modified = fetch(url, meta.get("etag", ""), meta.get("last_modified", ""))
+        self.timings[url] = {"fetch_ms": (time.perf_counter() - t0) * 1000, "bytes": len(payload or b"")}
+        if payload is None and meta:
+            # 304: данные не менялись
+            meta["checked_at"] = now
+            self._write_meta(meta_path, meta)
+            return self._reuse(url, data_path, "not-modified")
+        digest = hashlib.sha1(payload).hexdigest()
+        if meta and meta.get("digest") == digest:
+            # сервер не умеет в условные запросы, но байты те же — не разбираем заново
+            meta.update(etag=etag, last_modified=last_modified, checked_at=now)
+            self._write_meta(meta_path, meta)
+            return self._reuse(url, data_path, "same-content")
+        t0 = time.perf_counter()
+        df = parser(payload)
+        self.timings[url].update(parse_ms=(time.perf_counter() - t0) * 1000, categorize_ms=df.attrs.get("categorize_ms", 0.0))
+        self._write(url, df, {"url": url, "etag": etag, "last_modified": last_modified, "checked_at": now, "digest": digest})
+        self.outcomes[url] = "parsed"
+        self.evict()
+        return df
+
+    def _reuse(self, url: str, data_path: str, outcome: str) -> pd.DataFrame:
+        os.utime(data_path)
+        self.outcomes[url] = outcome
+        return pd.read_parquet(data_path)
+
+    def invalidate(self, url: str):
+        for path in self._paths(url):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def entries(self):
+        """(путь, байты, mtime) для листов (.parquet) и разобранных книг (каталоги xlsx-*)."""
+        if not self.enabled:
+            return []
+        out = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith(".parquet"):
+                    st_ = os.stat(path)
+                    out.append((path, st_.st_size, st_.st_mtime))
+                elif name.startswith("xlsx-") and not name.endswith(".tmp"):
+                    size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                    out.append((path, size, os.stat(path).st_mtime))
+            except FileNotFoundError:
+                continue
+        return out
+
+    def evict(self):
+        with self._lock:
+            now = time.time()
+            entries = sorted(self.entries(), key=lambda e: e[2])  # старые (давно не читанные) первыми
+            total = sum(size for _, size, _ in entries)
+            for path, size, mtime in entries:
+                if now - mtime <= self.max_age and total <= self.max_bytes:
+                    continue
+                if os.path.isdir(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    for p in (path, path[:-len(".parquet")] + ".json"):
+                        try:
+                            os.remove(p)
+                        except FileNotFoundError:
+                            pass
+                total -= size
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self.entries())
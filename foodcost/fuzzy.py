@@ -0,0 +1,142 @@
+# Второй этап категоризации: нечёткое сравнение по символьным n-граммам
+import numpy as np
+import pandas as pd
+
+from foodcost.categories import CATEGORY_KEYWORDS, OTHER_CATEGORY
+
+NGRAM_SIZES = (2, 3, 4)
+KEYWORD_NGRAM_SIZES = (3, 4)  # у основ из словаря биграммы слишком часто совпадают случайно
+KEYWORD_MIN_CHARS = 6  # частичное совпадение с короткой основой — скорее случайность
+BUCKETS = 1 << 16      # n-граммы хэшируются в фиксированное число корзин
+MAX_CHARS = 64         # длиннее названия обрезаются — хвост редко что-то решает
+MIN_CONFIDENCE = 0.5   # ниже — предложения нет
+CHUNK = 256            # названий на один плотный блок при сравнении с ключами
+
+def _codepoints(names, pad: bool = True) -> tuple:
+    # названия -> матрица кодов символов (n, MAX_CHARS + 2) и длины; pad — пробелы по краям
+    text = pd.Series(names, dtype=object).astype(str).str.lower().str.slice(0, MAX_CHARS)
+    if pad:
+        text = " " + text + " "
+    padded = text.to_numpy(dtype=f"U{MAX_CHARS + 2}")
+    codes = padded.view(np.uint32).reshape(len(padded), MAX_CHARS + 2).astype(np.uint64)
+    return codes, text.str.len().to_numpy()
+
+def _ngram_pairs(names, sizes=NGRAM_SIZES, pad: bool = True):
+    """Пары (номер названия, корзина) для всех n-грамм всех названий — без цикла по строкам."""
+    codes, lengths = _codepoints(names, pad)
+    docs, buckets = [], []
+    for n in sizes:
+        width = codes.shape[1] - n + 1
+        if width <= 0:
+            continue
+        h = np.full((len(codes), width), n, dtype=np.uint64)
+        for j in range(n):
+            h = h * np.uint64(1000003) ^ codes[:, j:j + width]
+        valid = np.arange(width)[None, :] + n <= lengths[:, None]
+        rows, _ = np.nonzero(valid)
+        docs.append(rows)
+        buckets.append((h[valid] % np.uint64(BUCKETS)).astype(np.int64))
+    return np.concatenate(docs), np.concatenate(buckets)
+
+def _tf(names, sizes=NGRAM_SIZES, pad: bool = True):
+    # частоты n-грамм: (номер названия, корзина, сколько раз), отсортированы по названию
+    docs, buckets = _ngram_pairs(names, sizes, pad)
+    keys, counts = np.unique(docs * BUCKETS + buckets, return_counts=True)
+    return keys // BUCKETS, keys % BUCKETS, counts.astype(np.float32)
+
+class NgramIndex:
+    """Индекс категорий по символьным n-граммам с весами TF-IDF.
+
+    Сходство с категорией считается двумя способами, берётся большее:
+
+    * косинус с центроидом категории — нормированной суммой tf·idf-векторов
+      уже распознанных названий (хэшированные 2-4-граммы);
+    * покрытие ключа словаря — доля idf-веса 3-4-грамм основы, найденная в
+      названии. Опечатка или другое окончание ломают подстроку, но оставляют
+      большую часть n-грамм: «кокосовая стружка» покрывает «стружк кокос».
+
+    Уверенность — сходство лучшей категории.
+    """
+
+    def __init__(self, names, labels, keywords: dict = None):
+        labels = pd.Series(labels, dtype=object).to_numpy()
+        keywords = {c: keys for c, keys in (keywords or {}).items() if keys}
+        self.categories = sorted(set(labels.tolist()) | set(keywords))
+        docs, buckets, tf = _tf(names)
+        df_count = np.bincount(buckets, minlength=BUCKETS)  # пары (название, корзина) уже уникальны
+        self.idf = (np.log((1 + len(labels)) / (1 + df_count)) + 1).astype(np.float32)
+        w = self._normalized(docs, buckets, tf, len(labels))
+        label_idx = pd.Index(self.categories).get_indexer(labels)
+        flat = np.bincount(label_idx[docs] * BUCKETS + buckets, weights=w, minlength=len(self.categories) * BUCKETS)
+        centroids = flat.reshape(len(self.categories), BUCKETS).astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = centroids / np.where(norms > 0, norms, 1)
+        # ключи словаря: n-граммы основы, их веса и категория каждого ключа
+        pairs = [(k, c) for c in self.categories for k in keywords.get(c, []) if len(k) >= KEYWORD_MIN_CHARS]
+        kw_docs, self.kw_buckets, _ = _tf([k for k, _ in pairs], KEYWORD_NGRAM_SIZES, pad=False)
+        self.kw_weights = self.idf[self.kw_buckets]
+        self.kw_starts = np.searchsorted(kw_docs, np.arange(len(pairs)))
+        self.kw_total = np.bincount(kw_docs, weights=self.kw_weights, minlength=len(pairs))
+        self.kw_category = pd.Index(self.categories).get_indexer([c for _, c in pairs])
+
+    def _normalized(self, docs, buckets, tf, n_docs):
+        w = tf * self.idf[buckets]
+        norms = np.sqrt(np.bincount(docs, weights=w * w, minlength=n_docs))
+        return w / np.where(norms > 0, norms, 1)[docs]
+
+    def scores(self, names) -> np.ndarray:
+        # косинусы (n_names, n_categories) одним проходом по всем n-граммам
+        n_docs = len(names)
+        if n_docs == 0 or not self.categories:
+            return np.zeros((n_docs, len(self.categories)), dtype=np.float32)
+        docs, buckets, tf = _tf(names)
+        w = self._normalized(docs, buckets, tf, n_docs)
+        contrib = self.centroids[:, buckets] * w
+        sc = np.stack([np.bincount(docs, weights=row, minlength=n_docs) for row in contrib], axis=1)
+        return np.maximum(sc, self._coverage(names))
+
+    def _coverage(self, names) -> np.ndarray:
+        # лучшее покрытие ключа каждой категории; названия идут плотными блоками по CHUNK
+        n_docs = len(names)
+        out = np.zeros((n_docs, len(self.categories)))
+        if not len(self.kw_total):
+            return out
+        docs, buckets, _ = _tf(names, KEYWORD_NGRAM_SIZES)
+        present = np.zeros((min(CHUNK, n_docs), BUCKETS), dtype=bool)
+        for start in range(0, n_docs, CHUNK):
+            stop = min(start + CHUNK, n_docs)
+            lo, hi = np.searchsorted(docs, [start, stop])
+            rows, cols = docs[lo:hi] - start, buckets[lo:hi]
+            present[rows, cols] = True
+            found = present[:stop - start][:, self.kw_buckets] * self.kw_weights
+            present[rows, cols] = False
+            cover = np.add.reduceat(found, self.kw_starts, axis=1) / self.kw_total
+            for cat in range(len(self.categories)):
+                cols = self.kw_category == cat
+                if cols.any():
+                    out[start:stop, cat] = cover[:, cols].max(axis=1)
+        return out
+
+    def suggest(self, names, min_confidence: float = MIN_CONFIDENCE) -> pd.DataFrame:
+        names = pd.Series(names, dtype=object).reset_index(drop=True)
+        sc = self.scores(names)
+        best = sc.argmax(axis=1) if sc.size else np.zeros(len(names), dtype=np.intp)
+        confidence = sc[np.arange(len(names)), best] if sc.size else np.zeros(len(names))
+        labels = np.array(self.categories + [None], dtype=object)
+        best = np.where(confidence >= min_confidence, best, len(self.categories))
+        return pd.DataFrame({"Товар": names, "Предложение": labels[best], "Уверенность": confidence.round(2)})
+
+def suggest_categories(cube: pd.DataFrame, other: str = OTHER_CATEGORY) -> pd.DataFrame:
+    """Предложения для всех названий из «Прочего» по уже распознанным названиям и словарю."""
+    names = cube["Товар"].astype(str)
+    is_other = (cube["Категория"] == other).to_numpy()
+    known = pd.DataFrame({"Товар": names[~is_other], "Категория": cube["Категория"][~is_other].astype(str)})
+    keywords = pd.DataFrame(
+        [(k, cat) for cat, keys in CATEGORY_KEYWORDS.items() if cat != other for k in keys],
+        columns=["Товар", "Категория"],
+    )
+    train = pd.concat([known, keywords], ignore_index=True).drop_duplicates("Товар")
+    unknown = names[is_other].drop_duplicates()
+    if unknown.empty:
+        return pd.DataFrame(columns=["Товар", "Предложение", "Уверенность"])
+    return NgramIndex(train["Товар"], train["Категория"], CATEGORY_KEYWORDS).suggest(unknown)
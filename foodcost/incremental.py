@@ -0,0 +1,74 @@
+# Инкрементальная сборка набора данных: пересчитываются только изменившиеся листы
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from foodcost.cube import DIMENSIONS, MEASURES, ROWS, build_cube
+from foodcost.loader import frame_digest
+
+ROW_KEY = ["Товар","Ед. изм.","Количество","Стоимость","Дата"]
+
+@dataclass
+class SheetState:
+    digest: str
+    row_hashes: np.ndarray
+    cube_part: pd.DataFrame
+
+def row_hashes(df_sheet: pd.DataFrame) -> np.ndarray:
+    return np.sort(pd.util.hash_pandas_object(df_sheet[ROW_KEY], index=False).to_numpy())
+
+def sheet_keys(frames):
+    # ключ листа — имя курса; повторяющиеся имена различаются порядковым номером
+    seen = {}
+    for df_sheet in frames:
+        course = str(df_sheet["Курсы"].iat[0]) if len(df_sheet) else ""
+        seen[course] = seen.get(course, -1) + 1
+        yield (course, seen[course])
+
+def merge_parts(parts) -> pd.DataFrame:
+    """Куб целиком из кубов листов; одинаковые ключи (один курс в двух листах) досуммируются."""
+    parts = [p for p in parts if not p.empty]
+    if not parts:
+        return pd.DataFrame(columns=DIMENSIONS + MEASURES + [ROWS])
+    cube = pd.concat(parts, ignore_index=True)
+    if cube.duplicated(DIMENSIONS).any():
+        cube = cube.groupby(DIMENSIONS, dropna=False, sort=False)[MEASURES + [ROWS]].sum().reset_index()
+    for col in DIMENSIONS:
+        cube[col] = cube[col].astype("category")
+    return cube
+
+class IncrementalBuilder:
+    """Помнит состояние каждого листа с прошлой сборки.
+
+    Неизменившийся лист (тот же digest) целиком переиспользуется вместе со
+    своей частью куба; у изменившегося часть куба строится заново по всем
+    его строкам. Строки изменившегося листа сравниваются с прошлой версией
+    по хэшу только для диагностики: сколько из них на самом деле новые.
+    """
+
+    def __init__(self):
+        self._sheets = {}
+
+    def cube(self, frames):
+        states, parts = {}, []
+        stats = {"листов переиспользовано": 0, "листов пересчитано": 0,
+                 "строк переиспользовано": 0, "строк пересчитано": 0, "из них без изменений": 0}
+        for key, df_sheet in zip(sheet_keys(frames), frames):
+            digest = frame_digest(df_sheet)
+            prev = self._sheets.get(key)
+            if prev is not None and prev.digest == digest:
+                state = prev
+                stats["листов переиспользовано"] += 1
+                stats["строк переиспользовано"] += len(df_sheet)
+            else:
+                hashes = row_hashes(df_sheet)
+                same = int(np.isin(hashes, prev.row_hashes).sum()) if prev is not None else 0
+                state = SheetState(digest, hashes, build_cube(df_sheet))
+                stats["листов пересчитано"] += 1
+                stats["строк пересчитано"] += len(df_sheet)
+                stats["из них без изменений"] += same
+            states[key] = state
+            parts.append(state.cube_part)
+        self._sheets = states  # исчезнувшие листы выпадают вместе со своей частью куба
+        return merge_parts(parts), stats
@@ -0,0 +1,72 @@
+# Параллельная загрузка всех листов
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from foodcost.dates import fill_course_date
+from foodcost.sheets import parse_sheet
+
+DEFAULT_MAX_WORKERS = 8
+
+@dataclass
+class SheetStatus:
+    url: str
+    course: str
+    status: str  # ok / empty / error
+    rows: int = 0
+    seconds: float = 0.0
+    error: str = ""
+
+def _load_one(reader, url: str, cname: str):
+    t0 = time.perf_counter()
+    try:
+        df_sheet = reader(url)
+    except Exception as exc:
+        return None, SheetStatus(url, cname, "error", 0, time.perf_counter() - t0, f"{type(exc).__name__}: {exc}")
+    elapsed = time.perf_counter() - t0
+    if df_sheet is None or df_sheet.empty:
+        return None, SheetStatus(url, cname, "empty", 0, elapsed)
+    df_sheet = df_sheet.copy()
+    df_sheet["Курсы"] = cname
+    fill_course_date(df_sheet, cname)
+    return df_sheet, SheetStatus(url, cname, "ok", len(df_sheet), elapsed)
+
+def load_sheets(urls, course_names, reader=parse_sheet, max_workers: int = DEFAULT_MAX_WORKERS, initializer=None):
+    """Грузит листы пулом потоков; не более max_workers запросов одновременно.
+
+    Упавший или пустой лист пропускается и не мешает остальным. Кадры и
+    статусы возвращаются в порядке urls.
+    """
+    pairs = list(zip(urls, course_names))
+    if not pairs:
+        return [], []
+    workers = max(1, min(int(max_workers), len(pairs)))
+    with ThreadPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+        results = list(pool.map(lambda p: _load_one(reader, *p), pairs))
+    frames = [df_sheet for df_sheet, _ in results if df_sheet is not None]
+    report = [status for _, status in results]
+    return frames, report
+
+def report_frame(report) -> pd.DataFrame:
+    return pd.DataFrame([
+        {"Курс": s.course, "Статус": s.status, "Строк": s.rows,
+         "Время, с": round(s.seconds, 3), "Ошибка": s.error, "URL": s.url}
+        for s in report
+    ])
+
+def frame_digest(df_sheet: pd.DataFrame) -> str:
+    digest = df_sheet.attrs.get("digest")
+    if digest is None:
+        digest = format(int(pd.util.hash_pandas_object(df_sheet, index=False).sum()) & (2**64 - 1), "x")
+    return digest
+
+def dataset_version(frames) -> str:
+    """Версия набора данных: меняется, если поменялся любой лист или имя курса."""
+    h = hashlib.sha1()
+    for df_sheet in frames:
+        course = str(df_sheet["Курсы"].iat[0]) if len(df_sheet) else ""
+        h.update(f"{course}\0{frame_digest(df_sheet)}\0{len(df_sheet)}\n".encode("utf-8"))
+    return h.hexdigest()
@@ -0,0 +1,82 @@
+# Постраничный просмотр больших таблиц и выгрузка кусками
+import io
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = [25, 50, 100, 250]
+EXPORT_CHUNK_ROWS = 50_000
+
+def sort_order(frame: pd.DataFrame, column: str, ascending: bool = True) -> np.ndarray:
+    """Позиции строк в порядке сортировки; пустые значения — в конце.
+
+    Возвращается только перестановка: сам кадр не копируется, страница
+    берётся из него по срезу перестановки.
+    """
+    values = frame[column]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    return values.reset_index(drop=True).sort_values(ascending=ascending, na_position="last", kind="stable").index.to_numpy()
+
+def search_mask(frame: pd.DataFrame, query: str, columns) -> np.ndarray:
+    """Строки, где query (без регистра) входит в любую из columns.
+
+    Поиск идёт по уникальным значениям колонки, а строкам достаётся по
+    кодам — названия в сводке повторяются по единицам и категориям.
+    """
+    query = (query or "").strip().lower()
+    mask = np.zeros(len(frame), dtype=bool)
+    if not query:
+        return ~mask
+    for col in columns:
+        codes, uniques = pd.factorize(frame[col], use_na_sentinel=True)
+        hit = pd.Series(uniques, dtype=object).astype(str).str.lower().str.contains(query, regex=False).to_numpy()
+        mask |= np.append(hit, False)[codes]
+    return mask
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+def page_positions(order: np.ndarray, mask: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """Позиции строк страницы page (с 1) среди найденных, в порядке сортировки."""
+    visible = order[mask[order]]
+    page = min(max(1, page), page_count(len(visible), page_size))
+    return visible[(page - 1) * page_size:page * page_size]
+
+def export_file(frame: pd.DataFrame, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Пишет кадр в CSV или Parquet кусками по chunk_rows строк.
+
+    В памяти одновременно только один кусок в текстовом виде, сам файл — на
+    диске. Возвращает временный файл, перемотанный в начало; закрывает его
+    вызывающий (файл удаляется при закрытии).
+    """
+    fh = tempfile.TemporaryFile()
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            table = pa.Table.from_pandas(frame.iloc[start:start + chunk_rows], preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(fh, table.schema)
+            writer.write_table(table)  # каждый кусок — отдельная row group
+        writer.close()
+    else:
+        text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="", write_through=True)
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            frame.iloc[start:start + chunk_rows].to_csv(text, index=False, header=start == 0)
+        text.flush()
+        text.detach()  # файл остаётся открытым для чтения
+    fh.seek(0)
+    return fh
+
+def export_bytes(frame: pd.DataFrame, fmt: str, chunk_rows: int = EXPORT_CHUNK_ROWS) -> bytes:
+    """Готовый файл выгрузки одним bytes — в таком виде его берёт st.download_button.
+
+    Streamlit всё равно держит весь ответ в памяти, поэтому кусками пишется
+    на диск, а в память файл читается ровно один раз.
+    """
+    with export_file(frame, fmt, chunk_rows) as fh:
+        return fh.read()
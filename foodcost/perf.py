@@ -0,0 +1,59 @@
+# Лёгкая инструментовка: отрезки времени по стадиям и счётчики
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+TRACE_FILE = os.environ.get("FOODCOST_TRACE_FILE", "")  # пусто — экспорт выключен
+
+class Tracer:
+    """Собирает отрезки одного прогона скрипта.
+
+    span() — это perf_counter и добавление в список, поэтому стоимость на
+    стадию — микросекунды. JSON lines пишутся только при заданном
+    trace_file; без него export() ничего не делает.
+    """
+
+    def __init__(self, trace_file: str = TRACE_FILE):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.trace_file = trace_file
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, **counters):
+        rec = {"stage": stage, **counters}
+        t0 = time.perf_counter()
+        try:
+            yield rec  # стадия может дописать счётчики: rec["rows"] = ...
+        finally:
+            rec["ms"] = (time.perf_counter() - t0) * 1000
+            with self._lock:
+                self.spans.append(rec)
+
+    def add(self, stage: str, ms: float, **counters):
+        # отрезок, измеренный в другом месте (например, при сборке снимка)
+        with self._lock:
+            self.spans.append({"stage": stage, "ms": ms, **counters})
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            spans = list(self.spans)
+        df = pd.DataFrame(spans)
+        if df.empty:
+            return df
+        cols = ["stage", "ms"] + [c for c in df.columns if c not in ("stage", "ms")]
+        return df[cols].round({"ms": 2})
+
+    def export(self):
+        if not self.trace_file:
+            return
+        ts = time.time()
+        with self._lock:
+            lines = [json.dumps({"run": self.run_id, "ts": ts, **rec}, ensure_ascii=False, default=str) for rec in self.spans]
+        with open(self.trace_file, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
@@ -0,0 +1,86 @@
+# Компактное представление объединённого кадра
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CATEGORICAL = ["Товар","Ед. изм.","Категория","Курсы"]
+NUMERIC_DECIMALS = {"Стоимость": 2, "Количество": 3}  # точность, которую нужно сохранить
+CALENDAR = ["Год","Месяц"]  # были в прежней схеме; теперь месяц — «Период» в кубе
+COLUMNS = ["Товар","Ед. изм.","Категория","Стоимость","Количество","Курсы","Дата"]
+
+def downcast_float(series: pd.Series, decimals: int) -> pd.Series:
+    """float32, только если он точно воспроизводит каждое значение.
+
+    Условия: ни в одном значении нет знаков дальше decimals, и округление
+    float32 до decimals возвращает ровно исходное float64 (см. restore_float).
+    Иначе — float64 без изменений.
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    narrow = values.astype("float32")
+    finite = np.isfinite(values)
+    exact = values[finite]
+    if np.array_equal(np.round(exact, decimals), exact) and np.array_equal(np.round(narrow[finite].astype("float64"), decimals), exact):
+        return pd.Series(narrow, index=series.index, name=series.name)
+    return pd.Series(values, index=series.index, name=series.name)
+
+def restore_float(series: pd.Series, decimals: int) -> np.ndarray:
+    # обратно в float64: float32 выбирается только когда округление восстанавливает значение точно
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    return np.round(values, decimals) if series.dtype == np.float32 else values
+
+def _shared_categorical(frames, col: str) -> pd.Categorical:
+    # общий словарь на все листы: каждое значение хранится один раз; числа и даты
+    # из ячеек xlsx приводятся к строке (иначе сортировка словаря падает), NaN остаётся NaN
+    parts = [pd.Categorical(_as_text(f[col])) for f in frames]
+    return union_categoricals(parts, sort_categories=True, ignore_order=True)
+
+def _as_text(series: pd.Series) -> pd.Series:
+    values = series.astype(object)
+    return values.where(values.isna(), values.map(str))
+
+def compact_concat(frames) -> pd.DataFrame:
+    """pd.concat листов сразу в компактную схему (category + float32 где безопасно)."""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return empty_frame()
+    data = {col: _shared_categorical(frames, col) for col in CATEGORICAL}
+    for col, decimals in NUMERIC_DECIMALS.items():
+        values = np.concatenate([f[col].to_numpy(dtype="float64", na_value=np.nan) for f in frames])
+        data[col] = downcast_float(pd.Series(values), decimals)
+    data["Дата"] = np.concatenate([_dates(f) for f in frames])
+    df = pd.DataFrame({col: data[col] for col in COLUMNS})
+    return df
+
+def _dates(df_sheet: pd.DataFrame) -> np.ndarray:
+    # лист из старого кэша может прийти без даты
+    if "Дата" not in df_sheet.columns:
+        return np.full(len(df_sheet), np.datetime64("NaT"), dtype="datetime64[ns]")
+    return df_sheet["Дата"].to_numpy(dtype="datetime64[ns]")
+
+def empty_frame() -> pd.DataFrame:
+    df = pd.DataFrame({col: pd.Series(dtype="float64") for col in NUMERIC_DECIMALS})
+    for col in CATEGORICAL:
+        df[col] = pd.Categorical([])
+    df["Дата"] = pd.Series(dtype="datetime64[ns]")
+    return df[COLUMNS]
+
+def legacy_footprint(df: pd.DataFrame) -> int:
+    """Оценка памяти того же кадра в прежней схеме (object + float64 + колонки Дата/Год/Месяц)."""
+    n = len(df)
+    total = 8 * n * (len(NUMERIC_DECIMALS) + 1 + len(CALENDAR))
+    for col in CATEGORICAL:
+        cat = df[col].cat
+        sizes = np.array([sys.getsizeof(v) for v in cat.categories], dtype="int64")
+        counts = np.bincount(cat.codes[cat.codes >= 0], minlength=len(sizes))
+        total += 8 * n + int((sizes * counts).sum())  # указатель + объект строки на каждую строку
+    return total + 128
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    after = df.memory_usage(deep=True, index=False)
+    rows = [{"Колонка": col, "Тип": str(df[col].dtype), "Байт": int(after[col])} for col in df.columns]
+    report = pd.DataFrame(rows)
+    report.attrs["before"] = legacy_footprint(df)
+    report.attrs["after"] = int(after.sum())
+    return report
@@ -0,0 +1,167 @@
+# Чтение одного листа (CSV) по позициям колонок
+import csv
+import hashlib
+import io
+import re
+import os
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+from urllib.parse import urlparse, parse_qs
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow не обязателен: тогда читает C-движок pandas
+    pa = pc = pacsv = None
+
+from foodcost.categories import classify_products
+from foodcost.dates import DATE_COLUMN, DATE_RULES, column_index, period_start, row_dates
+
+# ===== Колонки по позициям (1-базные) =====
+COL_D, COL_E, COL_F, COL_G, COL_N = 4, 5, 6, 7, 14  # D, E, F, G, N
+
+POSITIONS = [COL_D-1, COL_E-1, COL_F-1, COL_G-1, COL_N-1]  # 0-базные
+DATE_POS = column_index(DATE_COLUMN)  # колонка с датами накладных, читается вместе с POSITIONS
+LAYOUT = f"date={DATE_COLUMN};rules={DATE_RULES}".encode()  # входит в digest: другая колонка дат — другой разбор
+SNIFF_BYTES = 64 * 1024
+FETCH_TIMEOUT = 30
+
+_NUMERIC_TRANS = str.maketrans({"\u00a0": None, " ": None, ",": "."})
+_NUMBER_RE = r"^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$"
+
+def _arrow_numeric(series: pd.Series):
+    # разбор целиком в ядрах Arrow; None, если столбец не строковый
+    try:
+        arr = pa.array(series, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return None
+    arr = pc.replace_substring(pc.replace_substring_regex(arr, "[ \u00a0]", ""), ",", ".")
+    arr = pc.if_else(pc.match_substring_regex(arr, _NUMBER_RE), arr, None)
+    return pd.Series(pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False), index=series.index)
+
+def normalize_numeric(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    if pa is not None:
+        out = _arrow_numeric(series)
+        if out is not None:
+            return out
+    # один проход: убрать пробелы и NBSP, десятичную запятую заменить точкой
+    return pd.to_numeric(series.astype(str).str.translate(_NUMERIC_TRANS), errors="coerce").astype("float64")
+
+def guess_course_from_url(url: str, fallback: str) -> str:
+    # попытаемся вытащить gid, чтобы различать листы
+    try:
+        q = parse_qs(urlparse(url).query)
+        gid = q.get("gid", [""])[0]
+        return f"{fallback} (gid={gid})" if gid else fallback
+    except Exception:
+        return fallback
+
+def fetch(src, etag: str = "", last_modified: str = ""):
+    """Скачивает источник: URL, путь к файлу (в т. ч. file://) или уже скачанные байты.
+
+    Возвращает (байты или None, если не изменился, etag, last_modified).
+    Для URL etag/last_modified уходят условными заголовками (304 -> None),
+    для локального файла валидатор — mtime.
+    """
+    if isinstance(src, (bytes, bytearray)):
+        return bytes(src), "", ""
+    src = str(src)
+    if urlparse(src).scheme not in ("http", "https"):
+        path = src[len("file://"):] if src.startswith("file://") else src
+        mtime = str(os.stat(path).st_mtime_ns)
+        if last_modified and mtime == last_modified:
+            return None, etag, last_modified
+        with open(path, "rb") as fh:
+            return fh.read(), "", mtime
+    req = urllib.request.Request(src)
+    if etag:
+        req.add_header("If-None-Match", etag)
+    if last_modified:
+        req.add_header("If-Modified-Since", last_modified)
+    try:
+        with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT) as resp:
+            return resp.read(), resp.headers.get("ETag", ""), resp.headers.get("Last-Modified", "")
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304:
+            return None, etag, last_modified
+        raise
+
+def read_source(src) -> bytes:
+    # src — URL, путь к файлу или уже скачанные байты; всегда полное содержимое
+    return fetch(src)[0]
+
+def sniff_delimiter(head: bytes) -> str:
+    # разделитель — тот из , ; TAB, что чаще встречается в первой строке вне кавычек
+    line = head.decode("utf-8", errors="ignore").split("\n", 1)[0]
+    line = re.sub(r'"[^"]*"', "", line)
+    counts = {sep: line.count(sep) for sep in (",", ";", "\t")}
+    best = max(counts, key=counts.get)
+    return best if counts[best] else ","
+
+def header_width(head: bytes, sep: str) -> int:
+    text = head.decode("utf-8", errors="ignore")
+    row = next(csv.reader(io.StringIO(text), delimiter=sep), [])
+    return len(row)
+
+def read_positions(data: bytes, sep: str, ncols: int) -> pd.DataFrame:
+    """Читает только колонки D, E, F, G, N (как строки), пропуская заголовок.
+
+    Шестой колонкой идёт колонка дат, если она задана и есть в листе.
+    """
+    names = [f"c{i}" for i in range(ncols)]
+    use = [names[i] for i in POSITIONS]
+    if DATE_POS is not None and DATE_POS < ncols and DATE_POS not in POSITIONS:
+        use.append(names[DATE_POS])
+    if pacsv is not None:
+        try:
+            table = pacsv.read_csv(
+                io.BytesIO(data),
+                read_options=pacsv.ReadOptions(skip_rows=1, column_names=names),
+                parse_options=pacsv.ParseOptions(delimiter=sep, newlines_in_values=True),
+                convert_options=pacsv.ConvertOptions(
+                    include_columns=use, column_types={c: pa.string() for c in use}, strings_can_be_null=True
+                ),
+            )
+            return table.to_pandas()[use]
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass  # «рваные» строки и прочее — отдаём C-движку, он терпимее
+    return pd.read_csv(io.BytesIO(data), header=None, skiprows=1, names=names, usecols=use, dtype=str, sep=sep)[use]
+
+def parse_sheet(src) -> pd.DataFrame:
+    data = read_source(src)
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    head = data[:SNIFF_BYTES]
+    sep = sniff_delimiter(head)
+    ncols = header_width(head, sep)
+    if max(POSITIONS) >= ncols:
+        return pd.DataFrame()  # структура не совпала
+    raw = read_positions(data, sep, ncols)
+    dates = raw.iloc[:, len(POSITIONS)] if raw.shape[1] > len(POSITIONS) else None
+    default_date = period_start(head.decode("utf-8", errors="ignore"))
+    df = frame_from_columns(*(raw.iloc[:, i] for i in range(len(POSITIONS))), dates=dates, default_date=default_date)
+    df.attrs["digest"] = hashlib.sha1(data + LAYOUT).hexdigest()  # версия содержимого листа
+    return df
+
+def frame_from_columns(col_d, col_e, unit, qty, cost, dates=None, default_date=pd.NaT) -> pd.DataFrame:
+    # D+E — название, F — ед. изм., G — количество, N — стоимость;
+    # дата — из строк накладных в колонке дат, иначе начало периода из шапки листа
+    prod = (col_d.fillna("").astype(str) + " " + col_e.fillna("").astype(str)).str.strip()
+    df = pd.DataFrame({
+        "Товар": prod,
+        "Ед. изм.": unit,
+        "Количество": normalize_numeric(qty),
+        "Стоимость": normalize_numeric(cost),
+        "Дата": row_dates(dates, default_date) if dates is not None else pd.Series(default_date, index=prod.index, dtype="datetime64[ns]"),
+    })
+    df = df[df["Товар"].astype(str).str.strip() != ""].copy()
+    t0 = time.perf_counter()
+    df["Категория"] = classify_products(df["Товар"])
+    df.attrs["categorize_ms"] = (time.perf_counter() - t0) * 1000
+    return df
@@ -0,0 +1,152 @@
+# Общее для всех сессий хранилище данных с версиями
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+
+import pandas as pd
+
+from foodcost.cube import build_cube
+from foodcost.incremental import IncrementalBuilder
+from foodcost.loader import dataset_version
+from foodcost.schema import compact_concat
+from foodcost.timeseries import MonthlyStore, MonthlyView
+
+MAX_SOURCES = int(os.environ.get("FOODCOST_MAX_SOURCES", 8))        # источников с состоянием в процессе
+SOURCE_IDLE = float(os.environ.get("FOODCOST_SOURCE_IDLE", 3600))  # сек. без обращений до вытеснения
+
+@dataclass(eq=False)
+class Snapshot:
+    # общий для сессий снимок: читается, но никогда не изменяется на месте
+    version: str
+    df: pd.DataFrame
+    cube: pd.DataFrame
+    report: list
+    ingest: dict = field(default_factory=dict)
+    timings: dict = field(default_factory=dict)  # мс по стадиям сборки снимка
+    monthly: MonthlyView = None                  # разделы и тренды по месяцам
+    created_at: float = field(default_factory=time.time)
+    checked_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def build(cls, version: str, frames, report, builder: IncrementalBuilder = None,
+              months: MonthlyStore = None) -> "Snapshot":
+        t0 = time.perf_counter()
+        df = compact_concat(frames)
+        t1 = time.perf_counter()
+        if builder is None:
+            cube, ingest = build_cube(df), {}
+        else:
+            cube, ingest = builder.cube(frames)
+        t2 = time.perf_counter()
+        monthly, month_stats = (months or MonthlyStore()).update(cube)
+        t3 = time.perf_counter()
+        timings = {"concat": (t1 - t0) * 1000, "cube": (t2 - t1) * 1000, "months": (t3 - t2) * 1000}
+        return cls(version, df, cube, list(report), {**ingest, **month_stats}, timings, monthly)
+
+class DatasetStore:
+    """Один набор данных на процесс вместо копии на каждую сессию.
+
+    Источник (key) указывает на текущий снимок; обновление подменяет указатель
+    под блокировкой. Сессия держит ссылку на свой снимок, поэтому старая версия
+    живёт, пока на неё ссылается хоть одна сессия, и освобождается сборщиком
+    мусора после последней (WeakValueDictionary).
+
+    Новый текст списка ссылок или сохранённая книга — это новый key. Чтобы
+    прежние ключи не держали свои снимки и части кубов вечно, источники
+    вытесняются: сверх max_sources — давно не запрашивавшиеся, и все, к
+    которым не обращались дольше idle секунд.
+    """
+
+    def __init__(self, ttl: float, max_sources: int = MAX_SOURCES, idle: float = SOURCE_IDLE):
+        self.ttl = ttl
+        self.max_sources = max_sources
+        self.idle = idle
+        self._lock = threading.Lock()
+        self._heads = {}                                # key -> Snapshot
+        self._used = OrderedDict()                      # key -> время последнего get, старые первыми
+        self._versions = weakref.WeakValueDictionary()  # version -> Snapshot
+        self._loading = {}                              # key -> Lock
+        self._builders = {}                             # key -> IncrementalBuilder
+        self._months = {}                               # key -> MonthlyStore
+
+    def _fresh(self, key):
+        head = self._heads.get(key)
+        if head is not None and time.time() - head.checked_at < self.ttl:
+            return head
+        return None
+
+    def _touch(self, key):
+        # под self._lock: отметить обращение и вытеснить устаревшие источники
+        now = time.time()
+        self._used[key] = now
+        self._used.move_to_end(key)
+        while self._used:
+            oldest, used_at = next(iter(self._used.items()))
+            if len(self._used) <= self.max_sources and now - used_at <= self.idle:
+                break
+            self._forget(oldest)
+
+    def _forget(self, key):
+        del self._used[key]
+        self._heads.pop(key, None)
+        self._builders.pop(key, None)
+        self._months.pop(key, None)
+        key_lock = self._loading.get(key)
+        if key_lock is not None and not key_lock.locked():
+            del self._loading[key]
+
+    def get(self, key, loader):
+        """(снимок, собран ли он этим вызовом); loader() -> (frames, report) вызывается только при промахе.
+
+        False — снимок взят готовым: свежий, загруженный другой сессией, пока
+        ждали блокировку ключа, или уже известная версия данных.
+        """
+        with self._lock:
+            self._touch(key)
+            head = self._fresh(key)
+            if head is not None:
+                return head, False
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                head = self._fresh(key)  # пока ждали, другая сессия могла загрузить
+                if head is not None:
+                    return head, False
+            t0 = time.perf_counter()
+            frames, report = loader()
+            load_ms = (time.perf_counter() - t0) * 1000
+            version = dataset_version(frames)
+            with self._lock:
+                known = self._versions.get(version)
+                builder = self._builders.setdefault(key, IncrementalBuilder())
+                months = self._months.setdefault(key, MonthlyStore())
+            if known is None:
+                snap = Snapshot.build(version, frames, report, builder, months)
+                snap.timings["load_sources"] = load_ms  # снимок ещё никому не отдан
+            else:
+                # та же версия уже есть у сессий: данные общие, метаданные — в новом объекте;
+                # состояние листов и месяцев этого ключа всё равно переводим на неё,
+                # иначе следующая перезагрузка сравнивалась бы с прежней версией
+                _, ingest = builder.cube(frames)
+                _, month_stats = months.update(known.cube)
+                snap = replace(
+                    known, report=list(report), ingest={**ingest, **month_stats},
+                    timings={**known.timings, "load_sources": load_ms}, checked_at=time.time(),
+                )
+            with self._lock:
+                self._versions[version] = snap
+                self._heads[key] = snap  # атомарная подмена для новых запросов
+                self._touch(key)  # пока грузили, ключ могли вытеснить — возвращаем его в учёт
+            return snap, known is None
+
+    def invalidate(self, key):
+        # кэш частей листов не сбрасываем: после обновления пересчитается только изменившееся
+        with self._lock:
+            self._heads.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"источников": len(self._heads), "живых версий": len(self._versions)}
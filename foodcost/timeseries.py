@@ -0,0 +1,122 @@
+# Помесячные разделы куба и тренды по месяцам
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from foodcost.cube import DIMENSIONS, MEASURES, PERIOD, ROWS
+from foodcost.dates import NO_DATE, period_label
+
+TREND_KEYS = ["Курсы","Категория","Ед. изм."]  # по ним фильтруется помесячный тренд
+NO_UNIT = "без ед."  # подпись количества строк без единицы
+
+def _empty_cube() -> pd.DataFrame:
+    return pd.DataFrame(columns=DIMENSIONS + MEASURES + [ROWS])
+
+@dataclass(eq=False)
+class MonthlyView:
+    """Неизменяемый срез по месяцам для одного снимка.
+
+    partitions — части куба по периодам ГГГГММ: запрос за диапазон месяцев
+    склеивает только их. totals — предрасчитанные суммы по (Период, Курсы,
+    Категория, Ед. изм.): тренд по фильтрам считается по ним, без куба.
+    """
+
+    partitions: dict
+    totals: pd.DataFrame
+    mom: pd.DataFrame  # тренд без фильтров, с изменением к прошлому месяцу
+
+    def periods(self) -> list:
+        return sorted(p for p in self.partitions if p != NO_DATE)
+
+    def query(self, start: int, end: int) -> pd.DataFrame:
+        """Куб за месяцы [start, end]; остальные разделы не трогаются."""
+        parts = [part for p, part in self.partitions.items() if p != NO_DATE and start <= p <= end]
+        if not parts:
+            return _empty_cube()
+        return pd.concat(parts, ignore_index=True)
+
+    def trend(self, courses=None, units=None, categories=None, start: int = None, end: int = None) -> pd.DataFrame:
+        if not (courses or units or categories) and start is None and end is None:
+            return self.mom
+        t = self.totals
+        mask = pd.Series(True, index=t.index)
+        for col, values in (("Курсы", courses), ("Ед. изм.", units), ("Категория", categories)):
+            if values:
+                mask &= t[col].astype(str).isin([str(v) for v in values])
+        if start is not None:
+            mask &= t[PERIOD] >= start
+        if end is not None:
+            mask &= t[PERIOD] <= end
+        return month_over_month(t[mask])
+
+def month_over_month(totals: pd.DataFrame) -> pd.DataFrame:
+    """Суммы по месяцам и изменение к предыдущему месяцу; строки без даты не входят.
+
+    Количество в разных единицах не складывается: колонка на единицу
+    («Количество, кг», «Количество, шт», ...).
+    """
+    dated = totals[totals[PERIOD] != NO_DATE]
+    units = dated["Ед. изм."].astype(object).fillna(NO_UNIT)
+    qty = dated["Количество"].groupby([dated[PERIOD], units], sort=True).sum().unstack(fill_value=0)
+    qty.columns = [f"Количество, {u}" for u in qty.columns]
+    by_month = dated.groupby(PERIOD, sort=True)[["Стоимость"]].sum().join(qty)
+    by_month[ROWS] = dated.groupby(PERIOD, sort=True)[ROWS].sum()
+    if not by_month.empty:
+        # месяцы без закупок — нулями, чтобы изменение считалось к соседнему месяцу календаря
+        first, last = by_month.index[0], by_month.index[-1]
+        months = pd.period_range(f"{first // 100}-{first % 100:02d}", f"{last // 100}-{last % 100:02d}", freq="M")
+        by_month = by_month.reindex([p.year * 100 + p.month for p in months], fill_value=0)
+        by_month.index.name = PERIOD
+    out = by_month.reset_index()
+    out.insert(1, "Месяц", [period_label(p) for p in out[PERIOD]])
+    out["Δ Стоимость"] = out["Стоимость"].diff().round(2)
+    prev = out["Стоимость"].shift()
+    out["Δ %"] = (out["Δ Стоимость"] / prev.where(prev != 0) * 100).round(1)
+    return out
+
+class MonthlyStore:
+    """Разделы куба по месяцам с агрегатами, которые переживают перезагрузки.
+
+    update() режет новый куб по периодам и сравнивает каждый раздел с прошлым
+    по хэшу: агрегаты пересчитываются только для новых и изменившихся
+    месяцев, остальные берутся готовыми. Новый месяц в истории за несколько
+    лет — это один пересчитанный раздел, а не проход по всей истории.
+    """
+
+    def __init__(self):
+        self._parts = {}  # период -> (хэш, часть куба, суммы по TREND_KEYS)
+
+    def update(self, cube: pd.DataFrame):
+        parts, stats = {}, {"месяцев переиспользовано": 0, "месяцев пересчитано": 0}
+        changed = []
+        if not cube.empty:
+            periods = cube[PERIOD].astype("int64").to_numpy()
+            row_hash = pd.util.hash_pandas_object(cube, index=False).to_numpy()  # один проход по всему кубу
+            order = np.argsort(periods, kind="stable")
+            bounds = np.flatnonzero(np.diff(periods[order])) + 1
+            for idx in np.split(order, bounds):
+                period = int(periods[idx[0]])
+                digest = int(row_hash[idx].sum())  # сумма не зависит от порядка строк
+                prev = self._parts.get(period)
+                if prev is not None and prev[0] == digest:
+                    parts[period] = prev
+                    stats["месяцев переиспользовано"] += 1
+                else:
+                    parts[period] = (digest, cube.iloc[idx].reset_index(drop=True), None)
+                    changed.append(period)
+            stats["месяцев пересчитано"] = len(changed)
+        if changed:
+            # суммы всех изменившихся месяцев — одним groupby
+            fresh = pd.concat([parts[p][1] for p in changed], ignore_index=True)
+            agg = fresh.groupby([PERIOD] + TREND_KEYS, dropna=False, observed=True, sort=False)[MEASURES + [ROWS]].sum().reset_index()
+            agg[PERIOD] = agg[PERIOD].astype("int64")
+            for period, part_agg in agg.groupby(PERIOD, sort=False):
+                digest, part, _ = parts[period]
+                parts[period] = (digest, part, part_agg)
+        self._parts = parts  # исчезнувшие месяцы выпадают
+        aggs = [agg for _, _, agg in parts.values() if agg is not None]
+        totals = pd.concat(aggs, ignore_index=True) if aggs else pd.DataFrame(columns=[PERIOD] + TREND_KEYS + MEASURES + [ROWS])
+        totals[PERIOD] = totals[PERIOD].astype("int64")
+        view = MonthlyView({p: part for p, (_, part, _) in parts.items()}, totals, month_over_month(totals))
+        return view, stats
@@ -0,0 +1,50 @@
+# Приведение единиц измерения к каноническим (г -> кг, мл -> л)
+import numpy as np
+import pandas as pd
+
+# написание (без регистра, пробелов и точки на конце) -> (каноническая единица, множитель)
+UNIT_TABLE = {
+    "кг": ("кг", 1.0), "килограмм": ("кг", 1.0),
+    "г": ("кг", 0.001), "гр": ("кг", 0.001), "грамм": ("кг", 0.001),
+    "мг": ("кг", 0.000001),
+    "л": ("л", 1.0), "литр": ("л", 1.0),
+    "мл": ("л", 0.001),
+    "шт": ("шт", 1.0), "штук": ("шт", 1.0),
+    "уп": ("уп", 1.0), "упак": ("уп", 1.0),
+}
+
+def _spelling(values: pd.Series) -> pd.Series:
+    return values.astype(str).str.strip().str.lower().str.rstrip(".").str.strip()
+
+def unit_lookup(uniques) -> tuple:
+    """Для каждого уникального написания: каноническая единица и множитель.
+
+    Незнакомые единицы остаются как есть с множителем 1.
+    """
+    uniques = pd.Series(uniques, dtype=object)
+    known = _spelling(uniques).map(UNIT_TABLE)
+    canon = np.array([k[0] if isinstance(k, tuple) else u for k, u in zip(known, uniques)], dtype=object)
+    factor = np.array([k[1] if isinstance(k, tuple) else 1.0 for k in known], dtype="float64")
+    return canon, factor
+
+def normalize_units(units: pd.Series, qty: pd.Series) -> tuple:
+    """(канонические единицы, количество в них).
+
+    Таблица строится по уникальным написаниям (их единицы), а к строкам
+    применяется взятием по кодам и одним векторным умножением.
+    """
+    codes, uniques = pd.factorize(units, use_na_sentinel=True)
+    canon, factor = unit_lookup(uniques)
+    # код -1 (пустая единица) попадает на добавленные в конец NaN и множитель 1
+    canon = np.append(canon, np.nan)
+    factor = np.append(factor, 1.0)
+    normalized = pd.Series(pd.Categorical(canon[codes]), index=units.index, name=units.name)
+    return normalized, qty.to_numpy(dtype="float64", na_value=np.nan) * factor[codes]
+
+def unit_report(units: pd.Series) -> pd.DataFrame:
+    """Какие написания во что превратились — для диагностики."""
+    counts = units.value_counts(dropna=False)
+    canon, factor = unit_lookup(counts.index)
+    return pd.DataFrame({
+        "Как записано": counts.index.astype(str), "Единица": canon, "Множитель": factor, "Строк": counts.to_numpy(),
+    })
@@ -0,0 +1,185 @@
+# Потоковое чтение книги Фудкост.xlsx: каждый лист — курс
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+import pandas as pd
+
+from foodcost.dates import DATE_COLUMN, DATE_RULES, fill_course_date, period_start
+from foodcost.diskcache import CACHE_DIR, parquet_available
+from foodcost.loader import SheetStatus
+from foodcost.sheets import COL_D, COL_E, COL_F, COL_G, COL_N, DATE_POS, frame_from_columns
+
+DEFAULT_WORKBOOK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Фудкост.xlsx")
+HEADER_MARKER = "Товар"  # заголовок колонки D на листах с накладными; повторяется на каждой странице печати
+SUMMARY_MARKER = "Список накладных"  # после строк накладных идёт сводка по ним — её не читаем
+SUMMARY_COL = 2  # маркер сводки стоит в B или C, поэтому читаем не правее B
+HEADER_SCAN_ROWS = 20
+
+_fingerprints = {}  # path -> (mtime_ns, size, sha1)
+_memo = {}          # path -> (sha1, (frames, report))
+_lock = threading.Lock()
+
+def file_sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def workbook_fingerprint(path: str) -> str:
+    # хэш пересчитывается только если поменялись mtime или размер
+    st_ = os.stat(path)
+    with _lock:
+        known = _fingerprints.get(path)
+        if known and known[:2] == (st_.st_mtime_ns, st_.st_size):
+            return known[2]
+    digest = file_sha1(path)
+    with _lock:
+        _fingerprints[path] = (st_.st_mtime_ns, st_.st_size, digest)
+    return digest
+
+def iter_sheet_columns(ws):
+    """Построчно отдаёт (D, E, F, G, N, дата) с листа после строки-заголовка.
+
+    Повторные заголовки страниц пропускаются, чтение обрывается на сводке
+    «Список накладных» в конце листа. Возвращает (строки, начало периода из
+    шапки листа или NaT); строки — None, если на листе нет заголовка «Товар»
+    в колонке D (структура не совпала).
+    """
+    first = min(SUMMARY_COL, COL_D) if DATE_POS is None else min(SUMMARY_COL, COL_D, DATE_POS + 1)
+    rows = ws.iter_rows(min_col=first, max_col=COL_N, values_only=True)
+    d, e, f, g, n = COL_D-first, COL_E-first, COL_F-first, COL_G-first, COL_N-first
+    t = None if DATE_POS is None else DATE_POS + 1 - first
+    default_date = pd.NaT
+    for i, row in enumerate(rows):
+        if i >= HEADER_SCAN_ROWS:
+            return None, default_date
+        if row and len(row) > d and row[d] == HEADER_MARKER:
+            break
+        if pd.isna(default_date):
+            default_date = period_start(" ".join(v for v in row if isinstance(v, str)))
+    else:
+        return None, default_date
+
+    def gen():
+        for row in rows:
+            if SUMMARY_MARKER in row:
+                return
+            if len(row) > d and row[d] == HEADER_MARKER:
+                continue
+            if len(row) <= n:
+                row = tuple(row) + (None,) * (n + 1 - len(row))
+            yield row[d], row[e], row[f], row[g], row[n], (row[t] if t is not None else None)
+    return gen(), default_date
+
+def extract_workbook(path: str, digest: str = None):
+    """Читает книгу в режиме read_only, не загружая листы целиком в память.
+
+    digest — уже посчитанный sha1 файла (workbook_fingerprint), чтобы не читать файл дважды.
+    """
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        wb = load_workbook(path, read_only=True, data_only=True)
+    except (InvalidFileException, zipfile.BadZipFile, KeyError) as exc:
+        # не xlsx или битый архив — для вызывающих это та же ошибка данных, что и прочие ValueError
+        raise ValueError(f"не удалось прочитать книгу {os.path.basename(path)}: {type(exc).__name__}: {exc}") from exc
+    digest = digest or file_sha1(path)
+    frames, report = [], []
+    try:
+        for ws in wb.worksheets:
+            t0 = time.perf_counter()
+            cols, default_date = iter_sheet_columns(ws)
+            if cols is None:
+                report.append(SheetStatus(f"{path}#{ws.title}", ws.title, "empty", 0, time.perf_counter() - t0))
+                continue
+            d, e, f, g, n, t = [], [], [], [], [], []
+            for vd, ve, vf, vg, vn, vt in cols:
+                if vd is None and ve is None and vt is None:
+                    continue
+                d.append(vd); e.append(ve); f.append(vf); g.append(vg); n.append(vn); t.append(vt)
+            df_sheet = frame_from_columns(
+                pd.Series(d, dtype=object), pd.Series(e, dtype=object),
+                pd.Series(f, dtype=object), pd.Series(g, dtype=object), pd.Series(n, dtype=object),
+                dates=pd.Series(t, dtype=object), default_date=default_date,
+            )
+            elapsed = time.perf_counter() - t0
+            if df_sheet.empty:
+                report.append(SheetStatus(f"{path}#{ws.title}", ws.title, "empty", 0, elapsed))
+                continue
+            df_sheet["Курсы"] = ws.title
+            fill_course_date(df_sheet, ws.title)
+            df_sheet.attrs["digest"] = f"{digest}:{ws.title}"
+            frames.append(df_sheet.reset_index(drop=True))
+            report.append(SheetStatus(f"{path}#{ws.title}", ws.title, "ok", len(df_sheet), elapsed))
+    finally:
+        wb.close()
+    return frames, report
+
+def _disk_prefix(path: str) -> str:
+    # общая часть имени всех версий одной книги
+    return "xlsx-" + hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12] + "-"
+
+def _disk_dir(path: str, digest: str, root: str) -> str:
+    return os.path.join(root, f"{_disk_prefix(path)}{digest}-date{DATE_COLUMN}-r{DATE_RULES}")
+
+def _drop_old_versions(path: str, folder: str, root: str):
+    # прежние версии книги после сохранения файла больше не понадобятся
+    prefix = _disk_prefix(path)
+    for name in os.listdir(root):
+        if name.startswith(prefix) and not name.endswith(".tmp") and os.path.join(root, name) != folder:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+def _read_disk(folder: str):
+    with open(os.path.join(folder, "index.json"), encoding="utf-8") as fh:
+        index = json.load(fh)
+    frames = [pd.read_parquet(os.path.join(folder, f"{i}.parquet")) for i in range(index["frames"])]
+    report = [SheetStatus(**s) for s in index["report"]]
+    return frames, report
+
+def _write_disk(folder: str, frames, report):
+    tmp = f"{folder}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    for i, df_sheet in enumerate(frames):
+        df_sheet.to_parquet(os.path.join(tmp, f"{i}.parquet"), index=False)
+    with open(os.path.join(tmp, "index.json"), "w", encoding="utf-8") as fh:
+        json.dump({"frames": len(frames), "report": [vars(s) for s in report]}, fh, ensure_ascii=False)
+    try:
+        os.replace(tmp, folder)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # другой поток уже записал ту же версию
+
+def load_workbook_courses(path: str = DEFAULT_WORKBOOK, cache_root: str = CACHE_DIR):
+    """Кадры по всем листам книги; ключ кэша — mtime и sha1 файла.
+
+    Повторный вызов с тем же файлом отдаёт результат из памяти, после
+    рестарта — из Parquet на диске, без повторного разбора xlsx.
+    """
+    digest = workbook_fingerprint(path)
+    with _lock:
+        known = _memo.get(path)
+        if known and known[0] == digest:
+            return known[1]
+    folder = _disk_dir(path, digest, cache_root)
+    result = None
+    if parquet_available() and os.path.exists(os.path.join(folder, "index.json")):
+        try:
+            result = _read_disk(folder)
+            os.utime(folder)  # для вытеснения по давности, как у листов
+        except (OSError, ValueError, TypeError):
+            result = None
+    if result is None:
+        result = extract_workbook(path, digest)
+        if parquet_available():
+            os.makedirs(cache_root, exist_ok=True)
+            _write_disk(folder, *result)
+            _drop_old_versions(path, folder, cache_root)
+    with _lock:
+        _memo[path] = (digest, result)
+    return result
@@ -0,0 +1,63 @@
+# Сверка CategoryMatcher со старым detect_category на сгенерированном корпусе
+import random
+
+import numpy as np
+import pandas as pd
+
+from foodcost.categories import CATEGORY_KEYWORDS, CategoryMatcher, detect_category
+
+LETTERS = "абвгдеёжзийклмнопрстуфхцчшщъыьэюя"
+NOISE = ["свежий", "охл.", "зам.", "в/с", "1 сорт", "premium", "250 г", "(Россия)", "  "]
+
+def corpus(n: int, seed: int = 0) -> list:
+    # ключевые слова в разном регистре и окружении, несколько ключей в одном названии,
+    # случайные слова без ключей, пустые строки и NaN
+    rnd = random.Random(seed)
+    keywords = [k for keys in CATEGORY_KEYWORDS.values() for k in keys]
+    names = []
+    for _ in range(n):
+        parts = []
+        for _ in range(rnd.randint(0, 3)):
+            if rnd.random() < 0.6:
+                word = rnd.choice(keywords) + "".join(rnd.choices(LETTERS, k=rnd.randint(0, 3)))
+            else:
+                word = "".join(rnd.choices(LETTERS, k=rnd.randint(1, 9)))
+            parts.append(rnd.choice([word, word.upper(), word.capitalize()]))
+        if rnd.random() < 0.5:
+            parts.append(rnd.choice(NOISE))
+        rnd.shuffle(parts)
+        names.append(" ".join(parts))
+    names += ["", np.nan, None, "ЁЖИК", "печень куриная", "масло сливочное", "сливочный сыр"]
+    return names
+
+def test_classify_matches_detect_category():
+    names = pd.Series(corpus(50_000), dtype=object)
+    expected = names.map(detect_category)
+    got = CategoryMatcher().classify(names)
+    mismatched = names[got.to_numpy() != expected.to_numpy()]
+    assert mismatched.empty, mismatched.head(20).tolist()
+
+def test_memo_gives_same_result_on_repeat():
+    matcher = CategoryMatcher()
+    names = pd.Series(corpus(5_000, seed=1), dtype=object)
+    first = matcher.classify(names)
+    second = matcher.classify(names.sample(frac=1.0, random_state=0))
+    assert matcher.memo_hits > 0
+    pd.testing.assert_series_equal(first, second.loc[first.index])
+
+def test_classify_from_threads():
+    # листы классифицируются из пула загрузчика одним общим классификатором
+    from concurrent.futures import ThreadPoolExecutor
+
+    from foodcost import categories
+
+    matcher = CategoryMatcher()
+    batches = [pd.Series(corpus(3_000, seed=i), dtype=object) for i in range(32)]
+    limit, categories.MEMO_LIMIT = categories.MEMO_LIMIT, 10_000  # чтобы память и очищалась на ходу
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(matcher.classify, batches))
+    finally:
+        categories.MEMO_LIMIT = limit
+    for names, got in zip(batches, results):
+        assert got.tolist() == names.map(detect_category).tolist()
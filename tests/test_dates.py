@@ -0,0 +1,22 @@
+# Даты строк: колонка дат и заголовки накладных
+from datetime import datetime
+
+import pandas as pd
+
+from foodcost.dates import row_dates
+
+def test_only_invoice_headers_date_rows():
+    cells = pd.Series([
+        "расход", 'р/н "207523" от 01.05.2025', "расход", "Дата печати: 14.07.2025", None,
+        "Тип записи", "расход", "Период c 01.06.2025 по 30.06.2025", "расход", "д/к 17 от 03.06.2025", "расход",
+    ], dtype=object)
+    got = row_dates(cells, default=pd.Timestamp("2025-04-01"))
+    assert got.dt.strftime("%Y-%m-%d").tolist() == ["2025-04-01"] + ["2025-05-01"] * 8 + ["2025-06-03"] * 2
+
+def test_plain_date_column():
+    # обычная колонка дат, в том числе даты и дата/время из ячеек xlsx
+    cells = pd.Series(["01.05.2025", "2025-06-03", datetime(2025, 7, 4), "2025-08-05 00:00:00",
+                       pd.Timestamp("2025-09-06"), None, "Дата печати: 14.07.2025"], dtype=object)
+    got = row_dates(cells)
+    assert got.dt.strftime("%Y-%m-%d").tolist() == [
+        "2025-05-01", "2025-06-03", "2025-07-04", "2025-08-05", "2025-09-06", "2025-09-06", "2025-09-06"]
@@ -0,0 +1,86 @@
+# Параллельная загрузка листов с локального HTTP-сервера с фикстурами
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from foodcost.loader import load_sheets
+from foodcost.sheets import parse_sheet
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    # отдаёт CSV из fixtures с задержкой и считает одновременные запросы
+    delay = 0.2
+    lock = threading.Lock()
+    inflight = 0
+    peak = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.inflight += 1
+            cls.peak = max(cls.peak, cls.inflight)
+        try:
+            time.sleep(cls.delay)
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.inflight -= 1
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    FixtureHandler.inflight = FixtureHandler.peak = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), partial(FixtureHandler, directory=FIXTURES))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+def test_loads_fixture_sheets_over_http(server):
+    urls = [f"{server}/express.csv", f"{server}/base.csv"]
+    frames, report = load_sheets(urls, ["Экспресс", "База"], reader=parse_sheet)
+    assert [s.status for s in report] == ["ok", "ok"]
+    assert [len(f) for f in frames] == [4, 3]
+    express, base = frames
+    assert express["Курсы"].unique().tolist() == ["Экспресс"]
+    assert express["Стоимость"].sum() == pytest.approx(3595.40)
+    assert express["Категория"].tolist() == ["Мясо", "Сыр", "Фрукты/овощи", "Прочее"]
+    assert base["Количество"].tolist() == [2.0, 1.0, 5.0]  # разделитель «;» определяется сам
+    assert all(s.seconds >= FixtureHandler.delay for s in report)
+
+def test_failed_sheets_are_skipped(server):
+    urls = [f"{server}/express.csv", f"{server}/missing.csv", f"{server}/short.csv", f"{server}/base.csv"]
+    frames, report = load_sheets(urls, ["a", "b", "c", "d"], reader=parse_sheet)
+    assert [s.status for s in report] == ["ok", "error", "empty", "ok"]
+    assert "404" in report[1].error
+    assert [f["Курсы"].iat[0] for f in frames] == ["a", "d"]  # порядок urls сохраняется
+
+def test_concurrency_is_bounded(server):
+    urls = [f"{server}/express.csv"] * 6
+    t0 = time.perf_counter()
+    frames, report = load_sheets(urls, [f"к{i}" for i in range(6)], reader=parse_sheet, max_workers=2)
+    elapsed = time.perf_counter() - t0
+    assert len(frames) == 6
+    assert FixtureHandler.peak == 2
+    assert elapsed >= 3 * FixtureHandler.delay  # три волны по два запроса
+
+def test_sheet_cache_revalidates_with_conditional_get(server, tmp_path):
+    from foodcost.diskcache import SheetCache, parquet_available
+
+    if not parquet_available():
+        pytest.skip("нет pyarrow")
+    cache = SheetCache(root=str(tmp_path), ttl=0)
+    url = f"{server}/express.csv"
+    first = cache.get(url)
+    assert cache.outcomes[url] == "parsed"
+    second = cache.get(url)  # If-Modified-Since -> 304
+    assert cache.outcomes[url] == "not-modified"
+    assert second["Стоимость"].tolist() == first["Стоимость"].tolist()
@@ -0,0 +1,36 @@
+# Постраничный просмотр сводки и выгрузка кусками
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from foodcost.diskcache import parquet_available
+from foodcost.paging import export_bytes, export_file, page_positions, search_mask, sort_order
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        "Товар": ["Лук", "Сыр", "Лук красный", "Мука", "Сливки"],
+        "Стоимость": [10.0, np.nan, 30.0, 5.0, 20.0],
+    }, index=[7, 3, 9, 1, 4])
+
+def test_sort_search_and_page(frame):
+    order = sort_order(frame, "Стоимость", ascending=False)
+    assert frame["Товар"].iloc[order].tolist() == ["Лук красный", "Сливки", "Лук", "Мука", "Сыр"]  # NaN в конце
+    mask = search_mask(frame, " лук ", ["Товар"])
+    assert frame["Товар"].iloc[page_positions(order, mask, 1, 1)].tolist() == ["Лук красный"]
+    assert frame["Товар"].iloc[page_positions(order, mask, 9, 1)].tolist() == ["Лук"]  # номер страницы зажимается
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_in_chunks(frame, fmt):
+    if fmt == "parquet" and not parquet_available():
+        pytest.skip("нет pyarrow")
+    data = export_bytes(frame, fmt, chunk_rows=2)
+    back = pd.read_csv(io.BytesIO(data), encoding="utf-8-sig") if fmt == "csv" else pd.read_parquet(io.BytesIO(data))
+    pd.testing.assert_frame_equal(back, frame.reset_index(drop=True))
+
+def test_export_file_is_closed_by_caller(frame):
+    with export_file(frame, "csv") as fh:
+        assert fh.read(3) == b"\xef\xbb\xbf"
+    assert fh.closed
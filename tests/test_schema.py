@@ -0,0 +1,45 @@
+# Компактная схема и куб: точность сумм и смешанные типы в категориальных колонках
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from foodcost.cube import build_cube, product_summary
+from foodcost.schema import compact_concat
+from foodcost.sheets import frame_from_columns
+
+def sheet(names, units, qty, cost, course="Курс"):
+    n = len(names)
+    df = frame_from_columns(pd.Series(names), pd.Series([None] * n), pd.Series(units),
+                            pd.Series(qty), pd.Series(cost))
+    df["Курсы"] = course
+    return df
+
+def test_small_values_are_not_rounded_away():
+    # 100 строк по 0,0004 кг и 12,345 ₽: построчное округление дало бы 0.0 и 1234.0
+    df = sheet(["Соль"] * 100, ["кг"] * 100, ["0,0004"] * 100, ["12,345"] * 100)
+    compact = compact_concat([df])
+    assert compact["Стоимость"].dtype == np.float64  # float32 не воспроизводит 12,345 точно
+    for frame in (df, compact):
+        cube = build_cube(frame)
+        assert cube["Количество"].sum() == pytest.approx(0.04)
+        assert cube["Стоимость"].sum() == pytest.approx(1234.5)
+    assert product_summary(build_cube(compact))["Стоимость"].tolist() == [1234.5]
+
+def test_float32_only_when_exact():
+    df = sheet(["Лук"] * 3, ["кг"] * 3, ["1,5", "0,25", "2"], ["765,6", "10,01", "3"])
+    compact = compact_concat([df])
+    assert compact["Стоимость"].dtype == np.float32
+    cube = build_cube(compact)
+    assert cube["Стоимость"].sum() == pytest.approx(778.61, abs=1e-9)  # без хвостов float32
+
+def test_mixed_unit_types_share_categories():
+    # в xlsx «Ед. изм.» бывает числом или датой; сортировка общего словаря не должна падать
+    a = sheet(["Соль", "Сахар"], ["кг", 5], ["1", "2"], ["10", "20"])
+    b = sheet(["Молоко", "Сливки"], ["л", datetime(2025, 5, 1)], ["1", "1"], ["30", "40"], course="Другой")
+    b.loc[1, "Ед. изм."] = np.nan
+    units = compact_concat([a, b])["Ед. изм."]
+    assert units.tolist()[:3] == ["кг", "5", "л"]
+    assert pd.isna(units.iat[3])
+    assert compact_concat([a, sheet(["Сливки"], [datetime(2025, 5, 1)], ["1"], ["40"])])["Ед. изм."].iat[2] == "2025-05-01 00:00:00"
@@ -0,0 +1,101 @@
+# Общее хранилище снимков: неизменяемость и вытеснение источников
+import threading
+import time
+
+import pandas as pd
+
+from foodcost.cube import DIMENSIONS, MEASURES, ROWS, build_cube
+from foodcost.schema import compact_concat
+from foodcost.sheets import frame_from_columns
+from foodcost.store import DatasetStore
+
+def loader(n: int, course: str = "Курс"):
+    def load():
+        df = frame_from_columns(*(pd.Series(v, dtype=object) for v in (["Лук"] * n, [None] * n, ["кг"] * n, ["1"] * n, ["10"] * n)))
+        df["Курсы"] = course
+        return [df], []
+    return load
+
+def test_shared_snapshot_is_not_mutated():
+    store = DatasetStore(ttl=0)
+    first, built = store.get("a", loader(3))
+    assert built
+    ingest, timings, checked_at = dict(first.ingest), dict(first.timings), first.checked_at
+    second, built = store.get("b", loader(3))  # та же версия данных под другим ключом
+    assert second is not first and second.df is first.df and not built
+    assert (first.ingest, first.timings, first.checked_at) == (ingest, timings, checked_at)
+
+def test_stale_sources_are_evicted():
+    store = DatasetStore(ttl=100, max_sources=2)
+    for i, key in enumerate("abc"):
+        store.get(key, loader(i + 1))
+    assert store.stats()["источников"] == 2
+    assert set(store._builders) == set(store._months) == {"b", "c"}
+
+def test_idle_sources_are_evicted():
+    store = DatasetStore(ttl=100, idle=0.05)
+    store.get("a", loader(1))
+    time.sleep(0.1)
+    store.get("b", loader(2))
+    assert list(store._heads) == ["b"]
+
+def sheet(course: str, costs):
+    n = len(costs)
+    df = frame_from_columns(*(pd.Series(v, dtype=object) for v in (
+        [f"Товар {i}" for i in range(n)], [None] * n, ["кг"] * n, ["1"] * n, costs)))
+    df["Курсы"] = course
+    return df
+
+def same_cube(left, right):
+    key = DIMENSIONS
+    left = left.astype({c: object for c in key}).sort_values(key, ignore_index=True)
+    right = right.astype({c: object for c in key}).sort_values(key, ignore_index=True)
+    pd.testing.assert_frame_equal(left[key + MEASURES + [ROWS]], right[key + MEASURES + [ROWS]], check_dtype=False)
+
+def test_reload_rebuilds_only_changed_sheet():
+    a, b = sheet("А", ["10", "20", "30"]), sheet("Б", ["1", "2", "3", "4"])
+    edited = b.copy()
+    edited.loc[2, "Стоимость"] = 33.0
+    sources = {"frames": [a, b]}
+    store = DatasetStore(ttl=0)
+    load = lambda: (sources["frames"], [])
+    first, _ = store.get("k", load)
+    sources["frames"] = [a, edited]
+    second, built = store.get("k", load)
+    assert built
+    same_cube(second.cube, build_cube(compact_concat([a, edited])))
+    assert second.ingest["листов переиспользовано"] == 1 and second.ingest["листов пересчитано"] == 1
+    assert second.ingest["строк пересчитано"] == 4 and second.ingest["из них без изменений"] == 3
+    assert first.cube["Стоимость"].sum() == 70  # прежний снимок не изменился
+
+def test_known_version_moves_the_baseline():
+    # A -> B -> снова A (известная версия) -> C: C сравнивается с A, а не с B
+    a, b = sheet("А", ["10", "20"]), sheet("Б", ["1", "2"])
+    a2, b2 = a.copy(), b.copy()
+    a2.loc[0, "Стоимость"] = 11.0
+    b2.loc[0, "Стоимость"] = 5.0
+    store = DatasetStore(ttl=0)
+    kept = [store.get("k", lambda f=f: (f, []))[0] for f in ([a, b], [a, b2], [a, b])]
+    assert kept[2].df is kept[0].df
+    last, _ = store.get("k", lambda: ([a2, b], []))
+    assert last.ingest["листов пересчитано"] == 1 and last.ingest["листов переиспользовано"] == 1
+    assert last.ingest["месяцев пересчитано"] == 1
+    same_cube(last.cube, build_cube(compact_concat([a2, b])))
+
+def test_waiting_session_gets_the_loaded_snapshot():
+    # вторая сессия ждёт блокировку ключа, пока первая грузит, и получает готовый снимок
+    store = DatasetStore(ttl=100)
+    started, results = threading.Event(), []
+
+    def slow():
+        started.set()
+        time.sleep(0.2)
+        return loader(2)()
+
+    first = threading.Thread(target=lambda: results.append(store.get("k", slow)))
+    first.start()
+    started.wait()
+    results.append(store.get("k", loader(5)))
+    first.join()
+    (snap, built), (same, waited) = results
+    assert built and not waited and same is snap
@@ -0,0 +1,55 @@
+# Единицы измерения: перевод в канонические и суммы, которые не смешивают кг со штуками
+import numpy as np
+import pandas as pd
+import pytest
+
+from foodcost.cube import build_cube, category_summary
+from foodcost.sheets import frame_from_columns
+from foodcost.timeseries import NO_UNIT, MonthlyStore
+from foodcost.units import UNIT_TABLE, normalize_units
+
+@pytest.mark.parametrize("spelling, unit, qty", [
+    ("кг", "кг", 2.0), ("КГ.", "кг", 2.0), (" г. ", "кг", 0.002), ("гр", "кг", 0.002), ("мг", "кг", 0.000002),
+    ("л", "л", 2.0), ("мл", "л", 0.002), ("шт", "шт", 2.0), ("штук", "шт", 2.0), ("упак", "уп", 2.0),
+    ("банка", "банка", 2.0),  # незнакомая единица остаётся как есть
+])
+def test_unit_table_conversions(spelling, unit, qty):
+    units, values = normalize_units(pd.Series([spelling], dtype=object), pd.Series([2.0]))
+    assert units.iat[0] == unit
+    assert values[0] == pytest.approx(qty)
+
+def test_every_table_unit_is_canonical():
+    canon = {unit for unit, _ in UNIT_TABLE.values()}
+    assert all(UNIT_TABLE[unit] == (unit, 1.0) for unit in canon)
+
+def test_missing_units_stay_missing():
+    units, values = normalize_units(pd.Series(["г", None, np.nan, "л"], dtype=object), pd.Series([500.0, 3.0, 4.0, 1.0]))
+    assert units.isna().tolist() == [False, True, True, False]
+    assert values.tolist() == pytest.approx([0.5, 3.0, 4.0, 1.0])
+
+def sheet():
+    # «Птица» в килограммах и в штуках
+    names = ["Курица", "Яйцо", "Утка", "Соль"]
+    df = frame_from_columns(pd.Series(names), pd.Series([None] * 4), pd.Series(["кг", "шт", "г", None], dtype=object),
+                            pd.Series(["2", "30", "500", "1"]), pd.Series(["600", "300", "400", "10"]),
+                            dates=pd.Series(pd.to_datetime(["2025-05-01"] * 4)))
+    df["Категория"] = ["Птица", "Птица", "Птица", "Бакалея"]
+    df["Курсы"] = "Курс"
+    return df
+
+def test_category_quantities_are_per_unit():
+    cube = build_cube(sheet())
+    summary = category_summary(cube)
+    rows = {(c, u): q for c, u, q in summary[["Категория", "Ед. изм.", "Количество"]].itertuples(index=False)}
+    assert rows[("Птица", "кг")] == pytest.approx(2.5)
+    assert rows[("Птица", "шт")] == pytest.approx(30)
+    costs = category_summary(cube, by_unit=False)
+    assert "Количество" not in costs.columns
+    assert costs.set_index("Категория")["Стоимость"].to_dict() == {"Птица": 1300.0, "Бакалея": 10.0}
+
+def test_monthly_trend_quantity_per_unit():
+    view, _ = MonthlyStore().update(build_cube(sheet()))
+    row = view.mom.iloc[0]
+    assert row["Количество, кг"] == pytest.approx(2.5) and row["Количество, шт"] == pytest.approx(30)
+    assert row[f"Количество, {NO_UNIT}"] == pytest.approx(1) and "Количество" not in view.mom.columns
+    assert row["Стоимость"] == pytest.approx(1310)
@@ -0,0 +1,45 @@
+# Разбор приложенной книги Фудкост.xlsx
+import os
+
+import pandas as pd
+import pytest
+
+from foodcost.workbook import DEFAULT_WORKBOOK, HEADER_MARKER, extract_workbook
+
+pytestmark = pytest.mark.skipif(not os.path.exists(DEFAULT_WORKBOOK), reason="нет Фудкост.xlsx")
+
+@pytest.fixture(scope="module")
+def workbook():
+    frames, report = extract_workbook(DEFAULT_WORKBOOK)
+    return pd.concat(frames, ignore_index=True), report
+
+def test_page_headers_are_skipped(workbook):
+    df, _ = workbook
+    assert not (df["Товар"] == HEADER_MARKER).any()
+    assert not (df["Ед. изм."] == "Ед. изм.").any()
+
+def test_summary_block_is_not_read(workbook):
+    # сводка «Список накладных» в конце листа: «р/н 184828», даты и номера в колонке единиц
+    df, _ = workbook
+    assert not df["Товар"].str.startswith("р/н").any()
+    assert set(df["Ед. изм."].dropna().astype(str)) <= {"кг.", "г.", "шт", "л"}
+    assert len(df) == 4190
+    assert df["Стоимость"].sum() == pytest.approx(1744047.58)
+
+def test_rows_get_invoice_months(workbook):
+    # дата строки — из заголовка её накладной «р/н "..." от дд.мм.гггг», а не из «Дата печати: ...»
+    from foodcost.dates import period_key
+
+    df, _ = workbook
+    months = pd.Series(period_key(df["Дата"])).value_counts().sort_index().to_dict()
+    assert months == {202406: 121, 202408: 62, 202412: 203, 202501: 88, 202502: 594,
+                      202503: 917, 202504: 1228, 202505: 977}
+    intensive = df[df["Курсы"] == "Экспресс интенсив"]  # «Период c 01.05.2025 по 31.05.2025»
+    assert set(period_key(intensive["Дата"])) == {202505}
+
+@pytest.mark.parametrize("content", [b"not a zip", b"PK\x05\x06" + b"\0" * 18])
+def test_broken_workbook_is_a_value_error(tmp_path, content):
+    path = tmp_path / "broken.xlsx"
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match="broken.xlsx"):
+        extract_workbook(str(path))